@@ -1,40 +1,160 @@
-from fastapi import Depends, HTTPException, status
+import hashlib
+from datetime import datetime
+from typing import Callable, Optional
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from app.infrastructure.database import get_db, UserModel
-from app.infrastructure.repositories import UserRepository
+from app.infrastructure.database import get_db, SessionLocal, UserModel
+from app.infrastructure.repositories import UserRepository, ResourceVersionRepository
+from app.infrastructure.cache import get_cached_user, cache_user, get_gym_epoch
 from app.core.security import decode_access_token
+from app.core.config import settings
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login", auto_error=False)
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> UserModel:
-    credentials_exception = HTTPException(
+class TokenClaims(BaseModel):
+    email: str
+    gym_id: int
+    role: str
+    gym_active: bool
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> UserModel:
+    credentials_exception = _credentials_exception()
+
     payload = decode_access_token(token)
     if payload is None:
         raise credentials_exception
-        
+
     email: str = payload.get("sub")
     if email is None:
         raise credentials_exception
-    
+
+    user = get_cached_user(db, email)
+    if user is not None:
+        return user
+
     user_repo = UserRepository(db)
     user = user_repo.get_by_email(email)
     if user is None:
         raise credentials_exception
+    cache_user(user)
     return user
 
-def verify_active_gym(current_user: UserModel = Depends(get_current_user)) -> bool:
-    if not current_user.gym or not current_user.gym.is_active:
+def _claims_are_current(db: Session, payload: dict) -> bool:
+    required = ("sub", "gym_id", "role", "is_active", "epoch")
+    if any(payload.get(claim) is None for claim in required):
+        return False
+    return payload["epoch"] == get_gym_epoch(db, payload["gym_id"])
+
+def _claims_of(user: UserModel) -> TokenClaims:
+    return TokenClaims(
+        email=user.email,
+        gym_id=user.gym_id,
+        role=user.role,
+        gym_active=bool(user.gym and user.gym.is_active)
+    )
+
+def resolve_token_claims(token: str, db: Session) -> TokenClaims:
+    """Resolve tenant, role and gym state, from the JWT alone when the fast path is enabled.
+
+    Tokens missing claims or issued before the gym's current revocation epoch
+    fall back to loading the user, so a stale token is slower, never wrong.
+    """
+    if settings.AUTH_CLAIMS_FAST_PATH:
+        payload = decode_access_token(token)
+        if payload is None:
+            raise _credentials_exception()
+        if _claims_are_current(db, payload):
+            return TokenClaims(
+                email=payload["sub"],
+                gym_id=payload["gym_id"],
+                role=payload["role"],
+                gym_active=payload["is_active"]
+            )
+    return _claims_of(get_current_user(token, db))
+
+def _claims_from_token(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> TokenClaims:
+    return resolve_token_claims(token, db)
+
+def _claims_from_user(user: UserModel = Depends(get_current_user)) -> TokenClaims:
+    return _claims_of(user)
+
+# Chosen once at import. Without the fast path the claims come from the
+# get_current_user dependency itself, so a route that also declares
+# current_user shares FastAPI's per-request result instead of resolving
+# the user twice.
+get_token_claims = _claims_from_token if settings.AUTH_CLAIMS_FAST_PATH else _claims_from_user
+
+def get_stream_claims(
+    token: Optional[str] = Depends(oauth2_scheme_optional),
+    access_token: Optional[str] = None
+) -> TokenClaims:
+    """Claims for long-lived streams.
+
+    EventSource cannot set headers, so the token may also come as
+    ?access_token=. Uses its own short session: a request-scoped one would
+    hold a pooled connection for as long as the stream stays open.
+    """
+    token = token or access_token
+    if not token:
+        raise _credentials_exception()
+    db = SessionLocal()
+    try:
+        return resolve_token_claims(token, db)
+    finally:
+        db.close()
+
+def verify_active_gym(claims: TokenClaims = Depends(get_token_claims)) -> bool:
+    if not claims.gym_active:
         raise HTTPException(
-            status_code=403, 
+            status_code=403,
             detail="Suscripción inactiva. Por favor, completa el pago."
         )
     return True
 
-def get_tenant_id(current_user: UserModel = Depends(get_current_user)) -> int:
-    return current_user.gym_id
+def get_tenant_id(claims: TokenClaims = Depends(get_token_claims)) -> int:
+    return claims.gym_id
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+def conditional_get(resource: str, monthly: bool = False) -> Callable[..., int]:
+    """Dependency for conditional GETs on a per-gym versioned resource.
+
+    Sets a strong ETag built from the resource version, the gym and the
+    request path and query, and answers a matching If-None-Match with 304 before the route
+    body runs. `monthly` also varies the tag by calendar month, for data that
+    rolls over with it. Returns the version. Place it after the route's
+    access checks.
+    """
+    def check(
+        request: Request,
+        response: Response,
+        gym_id: int = Depends(get_tenant_id),
+        db: Session = Depends(get_db)
+    ) -> int:
+        version = ResourceVersionRepository(db).get(gym_id, resource)
+        variant = f"{resource}:{gym_id}:{version}:{request.url.path}?{request.url.query}"
+        if monthly:
+            variant += f":{datetime.now():%Y-%m}"
+        etag = f'"{hashlib.sha1(variant.encode()).hexdigest()[:20]}"'
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+        return version
+    return check
@@ -0,0 +1,22 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List
+from fastapi import HTTPException
+
+def encode_cursor(*values: Any) -> str:
+    """Opaque keyset cursor holding the sort key of the last row served."""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+def decode_cursor(cursor: str, *types: type) -> List[Any]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(payload) != len(types):
+            raise ValueError(cursor)
+        return [
+            datetime.fromisoformat(value) if kind is datetime and value is not None else value
+            for value, kind in zip(payload, types)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
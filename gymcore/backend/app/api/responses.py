@@ -0,0 +1,17 @@
+from typing import Iterable, List, Optional, Sequence
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+def row_dicts(rows: Iterable[Sequence], fields: Sequence[str]) -> List[dict]:
+    """Plain dicts from column tuples, in `fields` order."""
+    return [dict(zip(fields, row)) for row in rows]
+
+def fast_json(content, response: Optional[Response] = None) -> ORJSONResponse:
+    """Encode already-shaped data with orjson, skipping response_model validation.
+
+    Only for rows read straight from our own columns: the route's
+    response_model still documents the shape, but is not re-checked per row.
+    Headers set on the route's injected `response` (cursors, totals) are
+    carried over.
+    """
+    return ORJSONResponse(content, headers=dict(response.headers) if response is not None else None)
@@ -1,11 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
+from sqlalchemy import func, case, and_, or_
+from typing import List, Optional
 from datetime import datetime, timedelta
 
-from app.infrastructure.database import get_db, UserModel, GymModel, MemberModel, SubscriptionModel
+from app.infrastructure.database import get_db, UserModel, GymModel, MemberModel, SubscriptionModel, GymCounterModel
 from app.api.dependencies import get_current_user
+from app.api.pagination import encode_cursor, decode_cursor
+from app.api.responses import fast_json
+from app.infrastructure.repositories import AuthEpochRepository, PlatformMetricsRepository, ResourceVersionRepository
+from app.infrastructure.cache import invalidate_gym
+from app.core.cache import cache_stats
+from app.core.config import settings
+from app.core.security import password_hasher
+from app.infrastructure.member_index import member_index
+from app.infrastructure.search import search_gyms
+from app.infrastructure.attendance_buffer import attendance_buffer
+from app.infrastructure.expiry_sweeper import expiry_sweeper
+from app.infrastructure.notification_scheduler import notification_scheduler
+from app.infrastructure.notification_hub import notification_hub
+from app.infrastructure.checkin_feed import checkin_hub, occupancy
 
 router = APIRouter()
 
@@ -20,55 +34,113 @@ def verify_superadmin(current_user: UserModel = Depends(get_current_user)):
 
 @router.get("/stats")
 def get_admin_stats(
+    fresh: bool = False,
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_user),
     is_admin: bool = Depends(verify_superadmin)
 ):
-    """Obtener estadísticas globales del SaaS"""
-    
-    # Total de gimnasios
-    total_gyms = db.query(GymModel).count()
-    active_gyms = db.query(GymModel).filter(GymModel.is_active == True).count()
-    inactive_gyms = total_gyms - active_gyms
-    
-    # Total de socios en todos los gimnasios
-    total_members = db.query(MemberModel).count()
-    active_members = db.query(MemberModel).filter(MemberModel.membership_status == 'active').count()
-    
-    # Gimnasios registrados este mes
-    start_of_month = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    new_gyms_this_month = db.query(GymModel).filter(
-        GymModel.created_at >= start_of_month
-    ).count()
+    """Obtener estadísticas globales del SaaS.
+
+    Se leen de la fila platform_metrics, que se actualiza en la misma
+    transacción que cada escritura de gimnasios, socios y suscripciones. Se
+    recalcula desde cero con `?fresh=true` o cuando la última reconciliación
+    supera PLATFORM_METRICS_RECONCILE_SECONDS.
+    """
+    metrics_repo = PlatformMetricsRepository(db)
+    metrics = metrics_repo.get()
+    stale_before = datetime.now() - timedelta(seconds=settings.PLATFORM_METRICS_RECONCILE_SECONDS)
+    if fresh or metrics is None or metrics.reconciled_at is None or metrics.reconciled_at < stale_before:
+        metrics = metrics_repo.recompute()
+        db.commit()
     
-    # Ingresos totales (suma de todas las suscripciones activas)
-    total_revenue = db.query(func.sum(SubscriptionModel.amount)).filter(
-        SubscriptionModel.status == 'active'
-    ).scalar() or 0
+    # El contador del mes se reinicia con el primer gimnasio del mes siguiente
+    new_gyms_this_month = (
+        metrics.new_gyms_this_month if metrics.new_gyms_period == metrics_repo.current_period() else 0
+    )
     
     return {
-        "total_gyms": total_gyms,
-        "active_gyms": active_gyms,
-        "inactive_gyms": inactive_gyms,
-        "total_members": total_members,
-        "active_members": active_members,
+        "total_gyms": metrics.total_gyms,
+        "active_gyms": metrics.active_gyms,
+        "inactive_gyms": metrics.total_gyms - metrics.active_gyms,
+        "total_members": metrics.total_members,
+        "active_members": metrics.active_members,
         "new_gyms_this_month": new_gyms_this_month,
-        "total_revenue": float(total_revenue)
+        "total_revenue": float(metrics.active_revenue),
+        "reconciled_at": metrics.reconciled_at
+    }
+
+GYM_LIST_FIELDS = ["id", "name", "email", "phone", "address", "plan_type", "is_active", "created_at"]
+
+def _gym_list_row(row) -> dict:
+    member_total, active_total, attendances_today, sub_status, sub_plan_type, sub_amount, sub_end_date = row[len(GYM_LIST_FIELDS):]
+    return {
+        **dict(zip(GYM_LIST_FIELDS, row)),
+        "member_count": member_total,
+        "active_member_count": active_total,
+        "attendances_today": attendances_today,
+        "subscription": {
+            "status": sub_status,
+            "plan_type": sub_plan_type,
+            "amount": float(sub_amount or 0),
+            "end_date": sub_end_date
+        } if sub_status else None
     }
 
 @router.get("/gyms")
 def get_all_gyms(
+    response: Response,
     skip: int = 0,
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=500),
     status_filter: str = None,
     search: str = None,
+    sort: str = Query("id", pattern="^(id|member_count)$"),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_user),
     is_admin: bool = Depends(verify_superadmin)
 ):
-    """Obtener lista de todos los gimnasios"""
+    """Obtener lista de todos los gimnasios.
+
+    Una sola consulta: los conteos salen de gym_counters y la suscripción
+    activa de una subconsulta con ROW_NUMBER. Paginación por cursor con el
+    header X-Next-Cursor; `skip` se mantiene por compatibilidad. Se leen solo
+    columnas y la respuesta se codifica con orjson.
+    """
+    today = datetime.now().date()
     
-    query = db.query(GymModel)
+    # Suscripción activa más reciente por gimnasio
+    active_subscription = db.query(
+        SubscriptionModel.gym_id,
+        SubscriptionModel.status,
+        SubscriptionModel.plan_type,
+        SubscriptionModel.amount,
+        SubscriptionModel.end_date,
+        func.row_number().over(
+            partition_by=SubscriptionModel.gym_id,
+            order_by=SubscriptionModel.id.desc()
+        ).label("position")
+    ).filter(SubscriptionModel.status == 'active').subquery()
+    
+    member_count = func.coalesce(GymCounterModel.members, 0)
+    
+    query = db.query(
+        *(getattr(GymModel, field) for field in GYM_LIST_FIELDS),
+        member_count.label("member_count"),
+        func.coalesce(GymCounterModel.active_members, 0).label("active_member_count"),
+        case(
+            (GymCounterModel.attendances_date == today, GymCounterModel.attendances_today),
+            else_=0
+        ).label("attendances_today"),
+        active_subscription.c.status,
+        active_subscription.c.plan_type,
+        active_subscription.c.amount,
+        active_subscription.c.end_date
+    ).outerjoin(
+        GymCounterModel, GymCounterModel.gym_id == GymModel.id
+    ).outerjoin(
+        active_subscription,
+        and_(active_subscription.c.gym_id == GymModel.id, active_subscription.c.position == 1)
+    )
     
     # Filtro por estado
     if status_filter == 'active':
@@ -76,51 +148,37 @@ def get_all_gyms(
     elif status_filter == 'inactive':
         query = query.filter(GymModel.is_active == False)
     
-    # Búsqueda por nombre o email
+    # Búsqueda por nombre o email (índice FTS)
     if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            (GymModel.name.ilike(search_filter)) | 
-            (GymModel.email.ilike(search_filter))
+        query = search_gyms(db, query, search)
+    
+    # Orden y cursor
+    if sort == "member_count":
+        query = query.order_by(member_count.desc(), GymModel.id.desc())
+        if cursor:
+            after_count, after_id = decode_cursor(cursor, int, int)
+            query = query.filter(or_(
+                member_count < after_count,
+                and_(member_count == after_count, GymModel.id < after_id)
+            ))
+    else:
+        query = query.order_by(GymModel.id)
+        if cursor:
+            after_id, = decode_cursor(cursor, int)
+            query = query.filter(GymModel.id > after_id)
+    if skip and not cursor:
+        query = query.offset(skip)
+    
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = (
+            encode_cursor(last.member_count, last.id) if sort == "member_count"
+            else encode_cursor(last.id)
         )
     
-    # Obtener gimnasios con conteo de socios
-    gyms = query.offset(skip).limit(limit).all()
-    
-    result = []
-    for gym in gyms:
-        member_count = db.query(MemberModel).filter(MemberModel.gym_id == gym.id).count()
-        active_member_count = db.query(MemberModel).filter(
-            MemberModel.gym_id == gym.id,
-            MemberModel.membership_status == 'active'
-        ).count()
-        
-        # Obtener suscripción activa
-        subscription = db.query(SubscriptionModel).filter(
-            SubscriptionModel.gym_id == gym.id,
-            SubscriptionModel.status == 'active'
-        ).first()
-        
-        result.append({
-            "id": gym.id,
-            "name": gym.name,
-            "email": gym.email,
-            "phone": gym.phone,
-            "address": gym.address,
-            "plan_type": gym.plan_type,
-            "is_active": gym.is_active,
-            "created_at": gym.created_at,
-            "member_count": member_count,
-            "active_member_count": active_member_count,
-            "subscription": {
-                "status": subscription.status if subscription else None,
-                "plan_type": subscription.plan_type if subscription else None,
-                "amount": float(subscription.amount) if subscription else 0,
-                "end_date": subscription.end_date if subscription else None
-            } if subscription else None
-        })
-    
-    return result
+    return fast_json([_gym_list_row(row) for row in rows], response)
 
 @router.get("/gyms/{gym_id}")
 def get_gym_detail(
@@ -197,7 +255,11 @@ def toggle_gym_status(
     
     gym.is_active = not gym.is_active
     gym.updated_at = datetime.now()
+    AuthEpochRepository(db).bump(gym.id)
+    PlatformMetricsRepository(db).apply_delta(active_gyms=1 if gym.is_active else -1)
+    ResourceVersionRepository(db).bump(gym.id, ResourceVersionRepository.GYM_PROFILE)
     db.commit()
+    invalidate_gym(gym.id)
     db.refresh(gym)
     
     return {
@@ -206,3 +268,21 @@ def toggle_gym_status(
         "is_active": gym.is_active,
         "message": f"Gimnasio {'activado' if gym.is_active else 'desactivado'} exitosamente"
     }
+
+@router.get("/runtime-stats")
+def get_runtime_stats(
+    current_user: UserModel = Depends(get_current_user),
+    is_admin: bool = Depends(verify_superadmin)
+):
+    """Contadores de los caches en memoria de este proceso"""
+    return {
+        "caches": cache_stats(),
+        "password_hasher": password_hasher.stats(),
+        "member_index": member_index.stats(),
+        "attendance_buffer": attendance_buffer.stats(),
+        "expiry_sweeper": expiry_sweeper.stats(),
+        "notification_scheduler": notification_scheduler.stats(),
+        "notification_hub": notification_hub.stats(),
+        "checkin_hub": checkin_hub.stats(),
+        "occupancy": occupancy.stats()
+    }
@@ -1,12 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, WebSocket
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime
+from typing import List, Optional
+from datetime import datetime, timedelta
 
-from app.infrastructure.database import get_db, MemberModel, AttendanceModel, UserModel
-from app.api.dependencies import get_current_user, verify_active_gym
-from app.api.schemas.attendance import AttendanceCheckIn, AttendanceResponse, AttendanceStats
-from app.infrastructure.repositories import AttendanceRepository
+from app.infrastructure.database import get_db, SessionLocal, MemberModel, AttendanceModel, UserModel
+from app.api.dependencies import get_current_user, verify_active_gym, get_tenant_id, get_stream_claims
+from app.api.schemas.attendance import AttendanceCheckIn, AttendanceResponse, AttendanceStats, AttendanceBatchCheckIn, AttendanceBatchResult, AttendanceBatchResponse, AttendanceTimeseriesPoint, OccupancyResponse
+from app.infrastructure.repositories import AttendanceRepository, MemberRepository
+from app.infrastructure.member_index import member_index
+from app.infrastructure.attendance_buffer import attendance_buffer
+from app.infrastructure.checkin_feed import checkin_hub, occupancy, publish_check_ins
+from app.core.config import settings
+from app.api.pagination import encode_cursor, decode_cursor
+from app.api.streaming import stream_rows, json_message
+from app.api.responses import fast_json, row_dicts
 
 router = APIRouter()
 
@@ -14,15 +23,12 @@ router = APIRouter()
 def check_in_member(
     check_in: AttendanceCheckIn,
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user),
+    gym_id: int = Depends(get_tenant_id),
     active: bool = Depends(verify_active_gym)
 ):
     """Registrar asistencia de un socio por DNI"""
-    # Buscar socio por DNI
-    member = db.query(MemberModel).filter(
-        MemberModel.dni == check_in.dni,
-        MemberModel.gym_id == current_user.gym_id
-    ).first()
+    # Buscar socio por DNI en el índice en memoria del gimnasio
+    member = member_index.lookup(db, gym_id, check_in.dni)
     
     if not member:
         raise HTTPException(
@@ -45,51 +51,238 @@ def check_in_member(
         )
     
     # Registrar asistencia
+    if settings.ATTENDANCE_BUFFERED_WRITES:
+        check_in_time = datetime.now()
+        provisional_id = attendance_buffer.submit(member.member_id, gym_id, check_in_time, member.full_name, member.dni)
+        return AttendanceResponse(
+            id=provisional_id,
+            member_id=member.member_id,
+            member_name=member.full_name,
+            member_dni=member.dni,
+            check_in_time=check_in_time,
+            provisional=True
+        )
+    
     attendance_repo = AttendanceRepository(db)
-    attendance = attendance_repo.check_in(member.id, current_user.gym_id)
+    attendance = attendance_repo.check_in(member.member_id, gym_id)
     
-    return AttendanceResponse(
+    response = AttendanceResponse(
         id=attendance.id,
         member_id=attendance.member_id,
         member_name=member.full_name,
         member_dni=member.dni,
         check_in_time=attendance.check_in_time
     )
+    publish_check_ins(gym_id, [response.model_dump(exclude={"provisional"})])
+    return response
 
-@router.get("/today", response_model=List[AttendanceResponse])
-def get_today_attendances(
+@router.post("/check-in/batch", response_model=AttendanceBatchResponse)
+def check_in_batch(
+    batch: AttendanceBatchCheckIn,
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user),
+    gym_id: int = Depends(get_tenant_id),
     active: bool = Depends(verify_active_gym)
 ):
-    """Obtener todas las asistencias de hoy"""
-    attendance_repo = AttendanceRepository(db)
-    attendances = attendance_repo.get_today_by_gym(current_user.gym_id)
+    """Sincronizar en bloque los escaneos guardados por un kiosco sin conexión"""
+    members = MemberRepository(db).get_by_dnis(gym_id, [record.dni for record in batch.records])
+    
+    # Kiosk clocks drift; anything later than that is not a real scan
+    latest_scan = datetime.now() + timedelta(seconds=settings.ATTENDANCE_SCAN_CLOCK_SKEW_SECONDS)
+    
+    results = []
+    rows = []
+    accepted = []
+    for index, record in enumerate(batch.records):
+        scanned_at = record.scanned_at
+        if scanned_at.tzinfo is not None:
+            scanned_at = scanned_at.astimezone().replace(tzinfo=None)
+        
+        member = members.get(record.dni)
+        result = AttendanceBatchResult(index=index, dni=record.dni, status="ok")
+        if member is not None:
+            result.member_id = member.id
+            result.member_name = member.full_name
+        # Status is today's; it only says something about scans inside the membership period
+        if scanned_at > latest_scan:
+            result.status = "future"
+        elif member is None:
+            result.status = "not_found"
+        elif member.start_date is not None and scanned_at < member.start_date:
+            result.status = "before_start"
+        elif member.membership_status != 'active':
+            result.status = "inactive"
+        elif member.end_date < scanned_at:
+            result.status = "expired"
+        
+        if result.status == "ok":
+            rows.append({"member_id": member.id, "gym_id": gym_id, "check_in_time": scanned_at})
+            accepted.append(result)
+        results.append(result)
     
+    ids = AttendanceRepository(db).bulk_check_in(rows)
+    for result, attendance_id in zip(accepted, ids):
+        result.attendance_id = attendance_id
+    publish_check_ins(gym_id, [
+        {
+            "id": attendance_id,
+            "member_id": row["member_id"],
+            "member_name": result.member_name,
+            "member_dni": result.dni,
+            "check_in_time": row["check_in_time"]
+        }
+        for result, row, attendance_id in zip(accepted, rows, ids)
+    ])
+    
+    return AttendanceBatchResponse(
+        accepted=len(accepted),
+        rejected=len(results) - len(accepted),
+        results=results
+    )
+
+def _today_check_ins(db: Session, gym_id: int, since_id: Optional[int]) -> List[dict]:
     return [
-        AttendanceResponse(
-            id=att.id,
-            member_id=att.member_id,
-            member_name=att.member.full_name,
-            member_dni=att.member.dni,
-            check_in_time=att.check_in_time
-        )
-        for att in attendances
+        {
+            "id": row.id,
+            "member_id": row.member_id,
+            "member_name": row.full_name,
+            "member_dni": row.dni,
+            "check_in_time": row.check_in_time
+        }
+        for row in AttendanceRepository(db).get_today_by_gym(gym_id, since_id)
     ]
 
+def _since_id(since: Optional[str]) -> Optional[int]:
+    return decode_cursor(since, int)[0] if since else None
+
+def _sync_cursor(check_ins: List[dict], since: Optional[str]) -> Optional[str]:
+    """Cursor of the last check-in inserted among those served, to send back as `since`.
+
+    Keyed on the attendance id, not check_in_time: batch syncs insert scans
+    with past times that a time-based cursor would skip.
+    """
+    if not check_ins:
+        return since
+    return encode_cursor(max(item["id"] for item in check_ins))
+
+@router.get("/today", response_model=List[AttendanceResponse])
+def get_today_attendances(
+    response: Response,
+    since: Optional[str] = None,
+    db: Session = Depends(get_db),
+    gym_id: int = Depends(get_tenant_id),
+    active: bool = Depends(verify_active_gym)
+):
+    """Obtener las asistencias de hoy, las más recientes primero.
+
+    El header X-Sync-Cursor trae el valor a enviar como `since` en el
+    siguiente refresco, que devuelve solo las asistencias nuevas.
+    """
+    check_ins = _today_check_ins(db, gym_id, _since_id(since))
+    cursor = _sync_cursor(check_ins, since)
+    if cursor:
+        response.headers["X-Sync-Cursor"] = cursor
+    return check_ins
+
+@router.get("/occupancy", response_model=OccupancyResponse)
+def get_occupancy(
+    db: Session = Depends(get_db),
+    gym_id: int = Depends(get_tenant_id),
+    active: bool = Depends(verify_active_gym)
+):
+    """Socios distintos que registraron asistencia en la ventana reciente"""
+    return OccupancyResponse(
+        occupancy=occupancy.count(db, gym_id),
+        window_minutes=settings.OCCUPANCY_WINDOW_MINUTES
+    )
+
+def _load_live_snapshot(gym_id: int, since: Optional[str]) -> dict:
+    db = SessionLocal()
+    try:
+        check_ins = _today_check_ins(db, gym_id, _since_id(since))
+        count = occupancy.count(db, gym_id)
+    finally:
+        db.close()
+    return {
+        "type": "snapshot",
+        "check_ins": check_ins,
+        "occupancy": count,
+        "window_minutes": settings.OCCUPANCY_WINDOW_MINUTES,
+        "cursor": _sync_cursor(check_ins, since)
+    }
+
+async def _wait_disconnect(websocket: WebSocket) -> None:
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+@router.websocket("/live")
+async def live_check_ins(websocket: WebSocket, access_token: Optional[str] = None, since: Optional[str] = None):
+    """Canal WebSocket de asistencias del gimnasio en vivo.
+
+    Envía primero un `snapshot` con las asistencias de hoy (solo las
+    posteriores a `since` al reconectar) y la ocupación, y luego un mensaje
+    `check_in` por cada asistencia registrada. Cada mensaje trae `cursor`
+    para reconectar con ?since= sin recargar el día completo.
+    """
+    try:
+        claims = await run_in_threadpool(get_stream_claims, None, access_token)
+        _since_id(since)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    if not claims.gym_active:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    await websocket.accept()
+    # Subscribed before loading, so nothing registered in between is missed
+    subscription = checkin_hub.subscribe(claims.gym_id)
+    disconnected = asyncio.ensure_future(_wait_disconnect(websocket))
+    try:
+        snapshot = await run_in_threadpool(_load_live_snapshot, claims.gym_id, since)
+        cursor = snapshot["cursor"]
+        newest = _since_id(cursor)
+        await websocket.send_text(json_message(snapshot))
+        while True:
+            next_event = asyncio.ensure_future(subscription.queue.get())
+            done, _ = await asyncio.wait({disconnected, next_event}, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected in done:
+                next_event.cancel()
+                break
+            event = next_event.result()
+            if event is None:
+                await websocket.close()
+                break
+            name, data = event
+            if name == "resync":
+                # Fell behind: send what is missing since the last cursor sent
+                snapshot = await run_in_threadpool(_load_live_snapshot, claims.gym_id, cursor)
+                cursor = snapshot["cursor"]
+                newest = _since_id(cursor)
+                await websocket.send_text(json_message(snapshot))
+                continue
+            # Flushes from other threads can publish out of id order; the cursor only moves forward
+            attendance_id = data["check_in"]["id"]
+            if newest is None or attendance_id > newest:
+                newest = attendance_id
+                cursor = encode_cursor(newest)
+            await websocket.send_text(json_message({"type": name, **data, "cursor": cursor}))
+    finally:
+        checkin_hub.unsubscribe(subscription)
+        disconnected.cancel()
+
 @router.get("/member/{member_id}", response_model=List[AttendanceResponse])
 def get_member_attendances(
     member_id: int,
     limit: int = 10,
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user),
+    gym_id: int = Depends(get_tenant_id),
     active: bool = Depends(verify_active_gym)
 ):
     """Obtener historial de asistencias de un socio"""
     # Verificar que el socio pertenece al gym del usuario
     member = db.query(MemberModel).filter(
         MemberModel.id == member_id,
-        MemberModel.gym_id == current_user.gym_id
+        MemberModel.gym_id == gym_id
     ).first()
     
     if not member:
@@ -112,43 +305,94 @@ def get_member_attendances(
 @router.get("/stats", response_model=AttendanceStats)
 def get_attendance_stats(
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user),
+    gym_id: int = Depends(get_tenant_id),
     active: bool = Depends(verify_active_gym)
 ):
     """Obtener estadísticas de asistencias"""
     attendance_repo = AttendanceRepository(db)
-    stats = attendance_repo.get_stats(current_user.gym_id)
+    stats = attendance_repo.get_stats(gym_id)
     
     return AttendanceStats(**stats)
 
+@router.get("/timeseries", response_model=List[AttendanceTimeseriesPoint])
+def get_attendance_timeseries(
+    days: int = Query(30, ge=1, le=366),
+    granularity: str = Query("day", pattern="^(day|hour)$"),
+    db: Session = Depends(get_db),
+    gym_id: int = Depends(get_tenant_id),
+    active: bool = Depends(verify_active_gym)
+):
+    """Asistencias por día u hora de los últimos N días, leídas del resumen por hora"""
+    attendance_repo = AttendanceRepository(db)
+    return attendance_repo.get_timeseries(gym_id, days, granularity)
+
+ATTENDANCE_EXPORT_FIELDS = ["id", "member_id", "member_name", "member_dni", "check_in_time"]
+
+def _stream_attendance_rows(gym_id: int, start_date: Optional[datetime], end_date: Optional[datetime]):
+    # Own session: the generator outlives the request-scoped one
+    db = SessionLocal()
+    try:
+        yield from AttendanceRepository(db).iter_range(gym_id, start_date, end_date)
+    finally:
+        db.close()
+
+@router.get("/export")
+def export_attendances(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    gym_id: int = Depends(get_tenant_id),
+    active: bool = Depends(verify_active_gym)
+):
+    """Exportar asistencias en CSV o NDJSON, las más recientes primero.
+
+    Sin fechas se exporta el historial completo. Las filas se leen por lotes
+    y se transmiten a medida que llegan, con memoria constante.
+    """
+    return stream_rows(
+        _stream_attendance_rows(gym_id, start_date, end_date),
+        ATTENDANCE_EXPORT_FIELDS,
+        format,
+        filename="asistencias"
+    )
+
 @router.get("/range", response_model=List[AttendanceResponse])
 def get_attendances_by_range(
-    days: int = 7,
+    response: Response,
+    days: int = Query(7, ge=1),
+    limit: int = Query(500, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson|csv)$"),
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user),
+    gym_id: int = Depends(get_tenant_id),
     active: bool = Depends(verify_active_gym)
 ):
-    """Obtener asistencias de los últimos N días"""
-    from datetime import timedelta
-    
+    """Obtener asistencias de los últimos N días.
+
+    En JSON se pagina por cursor: si hay más resultados, el header
+    X-Next-Cursor trae el valor a enviar como `cursor`. Con format=ndjson|csv
+    se transmite el rango completo sin paginar y con memoria constante. El
+    JSON se arma desde las columnas y se codifica con orjson.
+    """
     end_date = datetime.now()
     start_date = end_date - timedelta(days=days)
     
-    attendances = db.query(AttendanceModel).join(
-        MemberModel, AttendanceModel.member_id == MemberModel.id
-    ).filter(
-        MemberModel.gym_id == current_user.gym_id,
-        AttendanceModel.check_in_time >= start_date,
-        AttendanceModel.check_in_time <= end_date
-    ).order_by(AttendanceModel.check_in_time.desc()).all()
-    
-    return [
-        AttendanceResponse(
-            id=att.id,
-            member_id=att.member_id,
-            member_name=att.member.full_name,
-            member_dni=att.member.dni,
-            check_in_time=att.check_in_time
+    if format != "json":
+        return stream_rows(
+            _stream_attendance_rows(gym_id, start_date, end_date),
+            ATTENDANCE_EXPORT_FIELDS,
+            format,
+            filename=f"asistencias_{days}d"
         )
-        for att in attendances
-    ]
+    
+    after = decode_cursor(cursor, datetime, int) if cursor else None
+    attendance_repo = AttendanceRepository(db)
+    rows = attendance_repo.get_range_page(gym_id, start_date, end_date, limit + 1, after)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].check_in_time, rows[-1].id)
+    
+    attendances = row_dicts(rows, ATTENDANCE_EXPORT_FIELDS)
+    for attendance in attendances:
+        attendance["provisional"] = False
+    return fast_json(attendances, response)
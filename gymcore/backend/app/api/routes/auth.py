@@ -1,21 +1,26 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 import uuid
-from app.infrastructure.database import get_db, PasswordResetTokenModel
+from app.infrastructure.database import get_db, PasswordResetTokenModel, UserModel
 from app.api.schemas.auth import GymRegisterRequest, LoginRequest, TokenResponse, UserResponse, GymResponse, ChangePasswordRequest, ForgotPasswordRequest, ResetPasswordRequest
 from app.application.use_cases.register_gym import RegisterGymUseCase
-from app.infrastructure.repositories import UserRepository, GymRepository
-from app.core.security import create_access_token, verify_password, get_password_hash
+from app.infrastructure.repositories import UserRepository, GymRepository, AuthEpochRepository
+from app.infrastructure.cache import invalidate_user
+from app.core.security import create_access_token, verify_password_async, hash_password_async
 from app.domain.entities import Gym, User
 from app.api.dependencies import get_current_user
 
 router = APIRouter()
 
+# The auth handlers are async so that waiting on bcrypt holds no request
+# thread; their database work still runs in the threadpool.
+
 @router.post("/register", status_code=status.HTTP_201_CREATED, response_model=GymResponse)
-def register_gym(request: GymRegisterRequest, db: Session = Depends(get_db)):
+async def register_gym(request: GymRegisterRequest, db: Session = Depends(get_db)):
     gym_repo = GymRepository(db)
-    if gym_repo.get_by_email(request.email):
+    if await run_in_threadpool(gym_repo.get_by_email, request.email):
         raise HTTPException(status_code=400, detail="Gym email already registered")
     
     gym_data = Gym(
@@ -30,22 +35,22 @@ def register_gym(request: GymRegisterRequest, db: Session = Depends(get_db)):
     admin_data = User(
         gym_id=0, # Placeholder, will be set in use case
         email=request.admin_email,
-        hashed_password=request.admin_password, # Use case will hash it
+        hashed_password=await hash_password_async(request.admin_password),
         full_name=request.admin_full_name,
         role='admin',
         is_active=True
     )
     
     use_case = RegisterGymUseCase(db)
-    result = use_case.execute(gym_data, admin_data)
+    result = await run_in_threadpool(use_case.execute, gym_data, admin_data)
     return result["gym"]
 
 @router.post("/login", response_model=TokenResponse)
-def login(request: LoginRequest, db: Session = Depends(get_db)):
+async def login(request: LoginRequest, db: Session = Depends(get_db)):
     user_repo = UserRepository(db)
-    user = user_repo.get_by_email(request.email)
+    user = await run_in_threadpool(user_repo.get_by_email, request.email)
     
-    if not user or not verify_password(request.password, user.hashed_password):
+    if not user or not await verify_password_async(request.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -58,7 +63,8 @@ def login(request: LoginRequest, db: Session = Depends(get_db)):
             "sub": user.email,
             "gym_id": user.gym_id,
             "role": user.role,
-            "is_active": user.gym.is_active
+            "is_active": user.gym.is_active,
+            "epoch": await run_in_threadpool(AuthEpochRepository(db).get, user.gym_id)
         }
     )
     
@@ -70,19 +76,20 @@ def login(request: LoginRequest, db: Session = Depends(get_db)):
     )
 
 @router.post("/change-password", status_code=status.HTTP_200_OK)
-def change_password(
+async def change_password(
     request: ChangePasswordRequest,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    if not verify_password(request.current_password, current_user.hashed_password):
+    if not await verify_password_async(request.current_password, current_user.hashed_password):
         raise HTTPException(status_code=400, detail="Incorrect current password")
     
     if request.new_password == request.current_password:
         raise HTTPException(status_code=400, detail="New password must be different from current password")
     
-    current_user.hashed_password = get_password_hash(request.new_password)
-    db.commit()
+    current_user.hashed_password = await hash_password_async(request.new_password)
+    await run_in_threadpool(db.commit)
+    invalidate_user(current_user.email)
     
     return {"message": "Password changed successfully"}
 
@@ -117,30 +124,35 @@ def forgot_password(request: ForgotPasswordRequest, db: Session = Depends(get_db
         "dev_token": token
     }
 
-@router.post("/reset-password")
-def reset_password(request: ResetPasswordRequest, db: Session = Depends(get_db)):
-    # Find token
+def _find_reset(db: Session, token: str):
+    """(reset token, its user) for a valid unused token, or (None, None)."""
     reset_token = db.query(PasswordResetTokenModel).filter(
-        PasswordResetTokenModel.token == request.token,
+        PasswordResetTokenModel.token == token,
         PasswordResetTokenModel.used == False,
         PasswordResetTokenModel.expires_at > datetime.utcnow()
     ).first()
+    if not reset_token:
+        return None, None
+    return reset_token, db.query(UserModel).filter(UserModel.id == reset_token.user_id).first()
+
+@router.post("/reset-password")
+async def reset_password(request: ResetPasswordRequest, db: Session = Depends(get_db)):
+    # Find token
+    reset_token, user = await run_in_threadpool(_find_reset, db, request.token)
     
     if not reset_token:
         raise HTTPException(status_code=400, detail="Invalid or expired token")
     
     # Update user password
-    user_repo = UserRepository(db)
-    user = db.query(User).filter(User.id == reset_token.user_id).first()
-    
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
         
-    user.hashed_password = get_password_hash(request.new_password)
+    user.hashed_password = await hash_password_async(request.new_password)
     
     # Mark token as used
     reset_token.used = True
     
-    db.commit()
+    await run_in_threadpool(db.commit)
+    invalidate_user(user.email)
     
     return {"message": "Password reset successfully"}
@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from typing import List
 from app.infrastructure.database import get_db, UserModel, PaymentMethodModel
-from app.api.dependencies import get_current_user, verify_active_gym
+from app.api.dependencies import get_current_user, verify_active_gym, get_tenant_id, conditional_get
 from app.api.schemas.billing import PaymentRequest, PaymentResponse, ChangePlanRequest, InvoiceResponse, UpdatePaymentMethodRequest
 from app.application.use_cases.process_payment import ProcessPaymentUseCase
-from app.infrastructure.repositories import SubscriptionRepository
+from app.infrastructure.repositories import SubscriptionRepository, AuthEpochRepository, PlatformMetricsRepository, ResourceVersionRepository
+from app.infrastructure.cache import invalidate_gym
+from app.api.responses import fast_json, row_dicts
 from app.domain.entities import Subscription
 
 router = APIRouter()
@@ -46,12 +48,12 @@ def mock_payment(
 
 @router.get("/subscription")
 def get_subscription(
-    current_user: UserModel = Depends(get_current_user),
+    gym_id: int = Depends(get_tenant_id),
     authorized: bool = Depends(verify_active_gym),
     db: Session = Depends(get_db)
 ):
     sub_repo = SubscriptionRepository(db)
-    subscription = sub_repo.get_active_by_gym(current_user.gym_id)
+    subscription = sub_repo.get_active_by_gym(gym_id)
     if not subscription:
         raise HTTPException(status_code=404, detail="No active subscription found")
     return subscription
@@ -72,7 +74,11 @@ def cancel_subscription(
     
     subscription.status = 'cancelled'
     subscription.cancelled_at = datetime.now()
+    AuthEpochRepository(db).bump(current_user.gym_id)
+    PlatformMetricsRepository(db).apply_delta(active_revenue=-(subscription.amount or 0))
+    ResourceVersionRepository(db).bump(current_user.gym_id, ResourceVersionRepository.INVOICES)
     db.commit()
+    invalidate_gym(current_user.gym_id)
     
     return {
         "message": "Subscription cancelled successfully",
@@ -111,8 +117,10 @@ def change_plan(
     # 4. Actualizar "gym.plan_type" en la base de datos.
     gym.plan_type = request.new_plan
     active_sub.plan_type = request.new_plan # Keep subscription in sync
+    ResourceVersionRepository(db).bump(gym.id, ResourceVersionRepository.GYM_PROFILE, ResourceVersionRepository.INVOICES)
     
     db.commit()
+    invalidate_gym(gym.id)
     
     # 6. Retornar confirmacion del cambio.
     return {
@@ -124,24 +132,16 @@ def change_plan(
 
 @router.get("/invoices", response_model=List[InvoiceResponse])
 def get_invoices(
-    current_user: UserModel = Depends(get_current_user),
+    response: Response,
+    gym_id: int = Depends(get_tenant_id),
     authorized: bool = Depends(verify_active_gym),
+    version: int = Depends(conditional_get(ResourceVersionRepository.INVOICES)),
     db: Session = Depends(get_db)
 ):
     sub_repo = SubscriptionRepository(db)
-    subscriptions = sub_repo.get_all_by_gym(current_user.gym_id)
-    
-    invoices = []
-    for sub in subscriptions:
-        invoices.append(InvoiceResponse(
-            id=sub.id,
-            date=sub.start_date,
-            amount=sub.amount,
-            plan=sub.plan_type,
-            status=sub.status
-        ))
-    
-    return invoices
+    rows = sub_repo.get_invoice_rows(gym_id)
+    
+    return fast_json(row_dicts(rows, ["id", "date", "amount", "plan", "status"]), response)
 
 @router.put("/payment-method")
 def update_payment_method(
@@ -1,144 +1,161 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import asyncio
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func, extract
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 
-from app.infrastructure.database import get_db, MemberModel, UserModel, MembershipPlanModel
-from app.api.dependencies import get_current_user, verify_active_gym
+from app.infrastructure.database import get_db, SessionLocal, MemberModel, UserModel, MembershipPlanModel
+from app.api.dependencies import get_current_user, verify_active_gym, get_tenant_id, conditional_get
 from app.api.schemas.members import MemberResponse
+from app.infrastructure.repositories import MemberRepository, RevenueLedgerRepository, AttendanceRepository, NotificationRepository, ResourceVersionRepository
+from app.infrastructure.cache import dashboard_cache
+from app.core.config import settings
 
 router = APIRouter()
 
 @router.get("/stats")
 def get_dashboard_stats(
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user),
-    active: bool = Depends(verify_active_gym)
+    gym_id: int = Depends(get_tenant_id),
+    active: bool = Depends(verify_active_gym),
+    version: int = Depends(conditional_get(ResourceVersionRepository.DASHBOARD, monthly=True))
 ):
-    gym_id = current_user.gym_id
-    
-    # Member counts
-    total_members = db.query(MemberModel).filter(MemberModel.gym_id == gym_id).count()
-    active_members = db.query(MemberModel).filter(
-        MemberModel.gym_id == gym_id, 
-        MemberModel.membership_status == 'active'
-    ).count()
-    inactive_members = db.query(MemberModel).filter(
-        MemberModel.gym_id == gym_id, 
-        MemberModel.membership_status == 'inactive'
-    ).count()
-    
-    # New members this month
-    start_of_month = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    new_members = db.query(MemberModel).filter(
-        MemberModel.gym_id == gym_id,
-        MemberModel.created_at >= start_of_month
-    ).count()
-    
-    # Membership distribution by plan names
-    distribution = db.query(
-        MembershipPlanModel.name, 
-        func.count(MemberModel.id)
-    ).join(
-        MemberModel, MemberModel.plan_id == MembershipPlanModel.id
-    ).filter(
-        MemberModel.gym_id == gym_id
-    ).group_by(MembershipPlanModel.name).all()
-    
-    membership_distribution = {name: count for name, count in distribution}
-    
-    # Calculate revenue based on actual plans
-    revenue = 0
-    for name, count in distribution:
-        plan = db.query(MembershipPlanModel).filter(
-            MembershipPlanModel.name == name,
-            MembershipPlanModel.gym_id == gym_id
-        ).first()
-        if plan:
-            revenue += count * plan.price
-        
-    return {
-        "total_members": total_members,
-        "active_members": active_members,
-        "inactive_members": inactive_members,
-        "revenue_this_month": revenue,
-        "new_members_this_month": new_members,
-        "membership_distribution": membership_distribution
-    }
+    return _stats(db, gym_id, version)
+
+def _stats(db: Session, gym_id: int, version: Optional[int] = None) -> dict:
+    # Cached with the dashboard version it was computed at, so another
+    # process's write can't be served under the new ETag from a stale entry
+    cached = dashboard_cache.get(gym_id)
+    if cached is not None and (version is None or cached[0] == version):
+        return cached[1]
+    if version is None:
+        version = ResourceVersionRepository(db).get(gym_id, ResourceVersionRepository.DASHBOARD)
+    stats = MemberRepository(db).get_dashboard_stats(gym_id)
+    dashboard_cache.set(gym_id, (version, stats))
+    return stats
 
 @router.get("/recent-activity", response_model=List[MemberResponse])
 def get_recent_activity(
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user),
-    active: bool = Depends(verify_active_gym)
+    gym_id: int = Depends(get_tenant_id),
+    active: bool = Depends(verify_active_gym),
+    version: int = Depends(conditional_get(ResourceVersionRepository.DASHBOARD))
 ):
-    recent_members = db.query(MemberModel).filter(
-        MemberModel.gym_id == current_user.gym_id
+    return _recent_activity(db, gym_id)
+
+def _recent_activity(db: Session, gym_id: int) -> List[MemberResponse]:
+    recent_members = db.query(MemberModel).options(
+        joinedload(MemberModel.membership_plan)
+    ).filter(
+        MemberModel.gym_id == gym_id
     ).order_by(MemberModel.created_at.desc()).limit(10).all()
     
-    return recent_members
+    return [MemberResponse.model_validate(member) for member in recent_members]
 
 @router.get("/revenue-chart")
 def get_revenue_chart(
+    months: int = Query(6, ge=1, le=36),
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user),
-    active: bool = Depends(verify_active_gym)
+    gym_id: int = Depends(get_tenant_id),
+    active: bool = Depends(verify_active_gym),
+    version: int = Depends(conditional_get(ResourceVersionRepository.DASHBOARD, monthly=True))
 ):
-    try:
-        gym_id = current_user.gym_id
-        
-        # Get last 6 months
-        now = datetime.now()
-        six_months_ago = now - relativedelta(months=5)
-        
-        # Spanish month names
-        month_names = {
-            1: "Ene", 2: "Feb", 3: "Mar", 4: "Abr", 5: "May", 6: "Jun",
-            7: "Jul", 8: "Ago", 9: "Sep", 10: "Oct", 11: "Nov", 12: "Dic"
+    """Ingresos por mes desde el libro de ingresos (altas y renovaciones)"""
+    return _revenue_chart(db, gym_id, months)
+
+def _revenue_chart(db: Session, gym_id: int, months: int = 6) -> List[dict]:
+    # Spanish month names
+    month_names = {
+        1: "Ene", 2: "Feb", 3: "Mar", 4: "Abr", 5: "May", 6: "Jun",
+        7: "Jul", 8: "Ago", 9: "Sep", 10: "Oct", 11: "Nov", 12: "Dic"
+    }
+    
+    now = datetime.now()
+    month_dates = [now - relativedelta(months=offset) for offset in range(months - 1, -1, -1)]
+    periods = [RevenueLedgerRepository.period_of(month_date) for month_date in month_dates]
+    
+    totals = RevenueLedgerRepository(db).monthly_totals(gym_id, periods[0], periods[-1])
+    
+    return [
+        {
+            "month": month_names[month_date.month],
+            "revenue": round(totals.get(period, 0), 2)
         }
-        
-        # Initialize data for last 6 months
-        data = []
-        for i in range(6):
-            month_date = six_months_ago + relativedelta(months=i)
-            month_num = month_date.month
-            year = month_date.year
-            
-            # Query members who started in this month with their plans
-            members_in_month = db.query(MemberModel).join(
-                MembershipPlanModel,
-                MemberModel.plan_id == MembershipPlanModel.id,
-                isouter=True
-            ).filter(
-                MemberModel.gym_id == gym_id,
-                extract('year', MemberModel.start_date) == year,
-                extract('month', MemberModel.start_date) == month_num
-            ).all()
-            
-            # Calculate revenue for this month
-            revenue = 0
-            for member in members_in_month:
-                if member.membership_plan:
-                    revenue += member.membership_plan.price
-                elif member.membership_type:
-                    # Fallback to legacy prices
-                    if member.membership_type == 'basic':
-                        revenue += 99
-                    elif member.membership_type == 'pro':
-                        revenue += 269
-                    elif member.membership_type == 'elite':
-                        revenue += 499
-            
-            data.append({
-                "month": month_names[month_num],
-                "revenue": round(revenue, 2)
-            })
-        
-        return data
-    except Exception as e:
-        print(f"Error in revenue-chart: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Error generating revenue chart: {str(e)}")
+        for month_date, period in zip(month_dates, periods)
+    ]
+
+def _notifications(db: Session, gym_id: int) -> dict:
+    notifications, unread_count = NotificationRepository(db).snapshot(gym_id)
+    return {
+        "notifications": [{k: v for k, v in n.items() if k != "gym_id"} for n in notifications],
+        "unread_count": unread_count
+    }
+
+# Sections of /bootstrap: same data as the individual endpoints
+BOOTSTRAP_SECTIONS = {
+    "stats": _stats,
+    "recent_activity": _recent_activity,
+    "revenue_chart": _revenue_chart,
+    "attendance_stats": lambda db, gym_id: AttendanceRepository(db).get_stats(gym_id),
+    "notifications": _notifications
+}
+
+# What the dashboard page renders; the rest only on ?include=
+DEFAULT_BOOTSTRAP_SECTIONS = ("stats", "recent_activity", "revenue_chart")
+
+# Pooled sessions all bootstrap sections may hold at once, across requests,
+# so concurrent dashboard loads can't drain the pool other requests share
+_section_slots = asyncio.Semaphore(settings.DASHBOARD_BOOTSTRAP_MAX_SESSIONS)
+
+def _run_section(section, gym_id: int):
+    # Own pooled session per section so they can run in parallel
+    db = SessionLocal()
+    start = time.perf_counter()
+    try:
+        return section(db, gym_id), (time.perf_counter() - start) * 1000
+    finally:
+        db.close()
+
+async def _run_section_limited(section, gym_id: int):
+    async with _section_slots:
+        return await run_in_threadpool(_run_section, section, gym_id)
+
+@router.get("/bootstrap")
+async def get_dashboard_bootstrap(
+    response: Response,
+    include: Optional[str] = None,
+    gym_id: int = Depends(get_tenant_id),
+    active: bool = Depends(verify_active_gym)
+):
+    """Todo lo que carga el dashboard en una sola petición.
+
+    Autentica una vez y ejecuta las secciones en paralelo, cada una con su
+    propia conexión del pool (con un tope global de conexiones para todas
+    las cargas a la vez). `include` elige las secciones separadas por comas
+    (stats, recent_activity, revenue_chart, attendance_stats,
+    notifications); por defecto, las tres primeras. `timings_ms` (y el
+    header Server-Timing) reporta cuánto tardó cada sección y el total.
+    """
+    names = [name.strip() for name in include.split(",") if name.strip()] if include else list(DEFAULT_BOOTSTRAP_SECTIONS)
+    unknown = [name for name in names if name not in BOOTSTRAP_SECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Secciones desconocidas: {', '.join(unknown)}")
+    names = list(dict.fromkeys(names))
+    
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        _run_section_limited(BOOTSTRAP_SECTIONS[name], gym_id) for name in names
+    ))
+    payload = {}
+    timings = {}
+    for name, (data, elapsed_ms) in zip(names, results):
+        payload[name] = data
+        timings[name] = round(elapsed_ms, 2)
+    timings["total"] = round((time.perf_counter() - start) * 1000, 2)
+    payload["timings_ms"] = timings
+    response.headers["Server-Timing"] = ", ".join(f"{name};dur={elapsed_ms}" for name, elapsed_ms in timings.items())
+    return payload
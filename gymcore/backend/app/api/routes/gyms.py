@@ -1,13 +1,26 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.infrastructure.database import get_db, UserModel
-from app.api.dependencies import get_current_user
+from app.api.dependencies import get_current_user, conditional_get
 from app.api.schemas.gyms import GymUpdateRequest
 from app.api.schemas.auth import GymResponse
-from app.infrastructure.repositories import GymRepository
+from app.infrastructure.repositories import GymRepository, ResourceVersionRepository
+from app.infrastructure.cache import invalidate_gym
 
 router = APIRouter()
 
+@router.get("/me", response_model=GymResponse)
+def get_gym_me(
+    current_user: UserModel = Depends(get_current_user),
+    version: int = Depends(conditional_get(ResourceVersionRepository.GYM_PROFILE)),
+    db: Session = Depends(get_db)
+):
+    """Perfil del gimnasio del usuario. Responde 304 si el ETag enviado sigue vigente."""
+    gym = GymRepository(db).get_by_id(current_user.gym_id)
+    if not gym:
+        raise HTTPException(status_code=404, detail="Gym not found")
+    return gym
+
 @router.put("/me", response_model=GymResponse)
 def update_gym_me(
     request: GymUpdateRequest,
@@ -43,8 +56,10 @@ def update_gym_me(
         gym.phone = request.phone
     if request.address:
         gym.address = request.address
+    ResourceVersionRepository(db).bump(gym.id, ResourceVersionRepository.GYM_PROFILE)
         
     db.commit()
+    invalidate_gym(gym.id)
     db.refresh(gym)
     
     return gym
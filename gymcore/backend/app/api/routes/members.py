@@ -1,35 +1,121 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, UploadFile, File
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from datetime import datetime, timedelta
 
-from app.infrastructure.database import get_db, MemberModel, UserModel
-from app.api.dependencies import get_current_user, verify_active_gym
-from app.api.schemas.members import MemberCreate, MemberUpdate, MemberResponse
+from app.infrastructure.database import get_db, SessionLocal, MemberModel, UserModel, MembershipPlanModel
+from app.api.dependencies import get_current_user, verify_active_gym, get_tenant_id
+from app.api.schemas.members import MemberCreate, MemberUpdate, MemberResponse, MemberImportResponse
+from app.api.streaming import read_rows, stream_rows
+from app.application.use_cases.import_members import ImportMembersUseCase
+from app.api.pagination import encode_cursor, decode_cursor
+from app.api.responses import fast_json
+from app.infrastructure.member_index import member_index
+from app.infrastructure.cache import invalidate_dashboard, member_totals_cache
+from app.infrastructure.repositories import MemberRepository, RevenueLedgerRepository, GymCounterRepository, ResourceVersionRepository
+from app.infrastructure.search import search_members
 
 router = APIRouter()
 
+def _active_delta(previous_status: Optional[str], new_status: Optional[str]) -> int:
+    return int(new_status == 'active') - int(previous_status == 'active')
+
+def _member_totals(db: Session, gym_id: int) -> dict:
+    totals = member_totals_cache.get(gym_id)
+    if totals is None:
+        totals = MemberRepository(db).count_by_status(gym_id)
+        member_totals_cache.set(gym_id, totals)
+    return totals
+
+# Columns read for the members list, in MemberResponse order
+MEMBER_LIST_FIELDS = [
+    "full_name", "dni", "email", "phone", "membership_type", "plan_id", "start_date",
+    "id", "gym_id", "membership_status", "end_date", "created_at", "updated_at"
+]
+PLAN_INFO_FIELDS = ["id", "name", "price", "duration_days"]
+
+def _member_list_rows(rows) -> List[dict]:
+    """MemberResponse-shaped dicts from column rows, without building models."""
+    split = len(MEMBER_LIST_FIELDS)
+    members = []
+    for row in rows:
+        member = dict(zip(MEMBER_LIST_FIELDS, row[:split]))
+        member["membership_plan"] = dict(zip(PLAN_INFO_FIELDS, row[split:])) if row[split] is not None else None
+        members.append(member)
+    return members
+
 @router.get("/", response_model=List[MemberResponse])
 def get_members(
+    response: Response,
     skip: int = 0,
-    limit: int = 10,
+    limit: int = Query(10, ge=1, le=1000),
     status: Optional[str] = None,
     search: Optional[str] = None,
+    sort: Optional[str] = Query(None, pattern="^(created_at|full_name)$"),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user),
+    gym_id: int = Depends(get_tenant_id),
     active: bool = Depends(verify_active_gym)
 ):
-    query = db.query(MemberModel).options(joinedload(MemberModel.membership_plan)).filter(MemberModel.gym_id == current_user.gym_id)
+    """Listar socios del gimnasio.
+
+    Paginación por cursor sobre (created_at, id) descendente o (full_name, id):
+    si hay más resultados, el header X-Next-Cursor trae el valor a enviar como
+    `cursor`. X-Total-Count lleva el total del estado filtrado, desde un conteo
+    en caché. Una búsqueda sin `sort` devuelve los más relevantes primero y no
+    pagina por cursor. `skip` se mantiene por compatibilidad.
+    
+    Las filas se leen por columnas y se codifican con orjson sin validarlas
+    contra MemberResponse.
+    """
+    query = db.query(
+        *(getattr(MemberModel, field) for field in MEMBER_LIST_FIELDS),
+        *(getattr(MembershipPlanModel, field).label(f"membership_plan_{field}") for field in PLAN_INFO_FIELDS)
+    ).outerjoin(
+        MembershipPlanModel, MembershipPlanModel.id == MemberModel.plan_id
+    ).filter(MemberModel.gym_id == gym_id)
     
     if status and status != 'all':
         query = query.filter(MemberModel.membership_status == status)
-        
+    
+    if search and sort is None:
+        query = search_members(db, query, gym_id, search)
+        return fast_json(_member_list_rows(query.offset(skip).limit(limit).all()), response)
+    
     if search:
-        search_filter = f"%{search}%"
-        query = query.filter(MemberModel.full_name.ilike(search_filter))
-        
-    members = query.offset(skip).limit(limit).all()
-    return members
+        query = search_members(db, query, gym_id, search, ranked=False)
+    else:
+        response.headers["X-Total-Count"] = str(_member_totals(db, gym_id).get(status or 'all', 0))
+    
+    if sort == "full_name":
+        query = query.order_by(MemberModel.full_name, MemberModel.id)
+        if cursor:
+            after_name, after_id = decode_cursor(cursor, str, int)
+            query = query.filter(or_(
+                MemberModel.full_name > after_name,
+                and_(MemberModel.full_name == after_name, MemberModel.id > after_id)
+            ))
+    else:
+        query = query.order_by(MemberModel.created_at.desc(), MemberModel.id.desc())
+        if cursor:
+            after_created_at, after_id = decode_cursor(cursor, datetime, int)
+            query = query.filter(or_(
+                MemberModel.created_at < after_created_at,
+                and_(MemberModel.created_at == after_created_at, MemberModel.id < after_id)
+            ))
+    if skip and not cursor:
+        query = query.offset(skip)
+    
+    members = query.limit(limit + 1).all()
+    if len(members) > limit:
+        members = members[:limit]
+        last = members[-1]
+        response.headers["X-Next-Cursor"] = (
+            encode_cursor(last.full_name, last.id) if sort == "full_name"
+            else encode_cursor(last.created_at, last.id)
+        )
+    return fast_json(_member_list_rows(members), response)
 
 @router.post("/", response_model=MemberResponse, status_code=status.HTTP_201_CREATED)
 def create_member(
@@ -42,6 +128,7 @@ def create_member(
     
     # Calculate end_date based on plan_id or membership_type
     duration_days = 30  # Default
+    plan = None
     
     if member.plan_id:
         # Use custom plan
@@ -80,20 +167,82 @@ def create_member(
     )
     
     db.add(db_member)
+    db.flush()
+    RevenueLedgerRepository(db).record(db_member, plan, 'new', occurred_at=member.start_date)
+    GymCounterRepository(db).apply_member_delta(current_user.gym_id, members=1, active_members=1)
+    ResourceVersionRepository(db).bump(current_user.gym_id, ResourceVersionRepository.DASHBOARD)
     db.commit()
     db.refresh(db_member)
+    member_index.upsert(db_member)
+    invalidate_dashboard(current_user.gym_id)
     return db_member
 
+@router.post("/import", response_model=MemberImportResponse)
+def import_members(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+    active: bool = Depends(verify_active_gym)
+):
+    """Importar socios en bloque desde un CSV (con cabecera) o NDJSON.
+
+    Columnas: full_name, dni, email, phone y opcionalmente plan_id o plan
+    (nombre), membership_type, start_date y end_date. El archivo se procesa
+    por bloques de 500 filas, cada uno en su propia transacción; las filas con
+    errores se informan y se omiten.
+    """
+    if format is None:
+        format = "ndjson" if (file.filename or "").lower().endswith((".ndjson", ".jsonl")) else "csv"
+    
+    result = ImportMembersUseCase(db).execute(current_user.gym_id, read_rows(file.file, format))
+    if result["created"]:
+        member_index.invalidate(current_user.gym_id)
+        invalidate_dashboard(current_user.gym_id)
+    return result
+
+MEMBER_EXPORT_FIELDS = [
+    "id", "full_name", "dni", "email", "phone", "membership_status", "plan",
+    "membership_type", "start_date", "end_date", "created_at"
+]
+
+def _stream_member_rows(gym_id: int, status: Optional[str]):
+    # Own session: the generator outlives the request-scoped one
+    db = SessionLocal()
+    try:
+        yield from MemberRepository(db).iter_export(gym_id, status)
+    finally:
+        db.close()
+
+@router.get("/export")
+def export_members(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    status: Optional[str] = None,
+    gym_id: int = Depends(get_tenant_id),
+    active: bool = Depends(verify_active_gym)
+):
+    """Exportar socios en CSV o NDJSON.
+
+    Las filas se leen por lotes y se transmiten a medida que llegan, con
+    memoria constante sin importar el tamaño del gimnasio.
+    """
+    return stream_rows(
+        _stream_member_rows(gym_id, status if status != 'all' else None),
+        MEMBER_EXPORT_FIELDS,
+        format,
+        filename="socios"
+    )
+
 @router.get("/{member_id}", response_model=MemberResponse)
 def get_member(
     member_id: int,
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user),
+    gym_id: int = Depends(get_tenant_id),
     active: bool = Depends(verify_active_gym)
 ):
     member = db.query(MemberModel).filter(
         MemberModel.id == member_id,
-        MemberModel.gym_id == current_user.gym_id
+        MemberModel.gym_id == gym_id
     ).first()
     
     if not member:
@@ -116,12 +265,21 @@ def update_member(
     if not db_member:
         raise HTTPException(status_code=404, detail="Member not found")
         
+    previous_dni = db_member.dni
+    previous_status = db_member.membership_status
     update_data = member_update.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_member, key, value)
-        
+    
+    GymCounterRepository(db).apply_member_delta(
+        current_user.gym_id,
+        active_members=_active_delta(previous_status, db_member.membership_status)
+    )
+    ResourceVersionRepository(db).bump(current_user.gym_id, ResourceVersionRepository.DASHBOARD)
     db.commit()
     db.refresh(db_member)
+    member_index.upsert(db_member, previous_dni=previous_dni)
+    invalidate_dashboard(current_user.gym_id)
     return db_member
 
 @router.delete("/{member_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -140,7 +298,15 @@ def delete_member(
         raise HTTPException(status_code=404, detail="Member not found")
         
     db.delete(db_member)
+    GymCounterRepository(db).apply_member_delta(
+        current_user.gym_id,
+        members=-1,
+        active_members=_active_delta(db_member.membership_status, None)
+    )
+    ResourceVersionRepository(db).bump(current_user.gym_id, ResourceVersionRepository.DASHBOARD)
     db.commit()
+    member_index.remove(current_user.gym_id, db_member.dni)
+    invalidate_dashboard(current_user.gym_id)
     return None
 
 @router.patch("/{member_id}/suspend", response_model=MemberResponse)
@@ -158,9 +324,16 @@ def suspend_member(
     if not db_member:
         raise HTTPException(status_code=404, detail="Member not found")
         
+    GymCounterRepository(db).apply_member_delta(
+        current_user.gym_id,
+        active_members=_active_delta(db_member.membership_status, 'suspended')
+    )
     db_member.membership_status = 'suspended'
+    ResourceVersionRepository(db).bump(current_user.gym_id, ResourceVersionRepository.DASHBOARD)
     db.commit()
     db.refresh(db_member)
+    member_index.upsert(db_member)
+    invalidate_dashboard(current_user.gym_id)
     return db_member
 
 @router.patch("/{member_id}/activate", response_model=MemberResponse)
@@ -178,7 +351,50 @@ def activate_member(
     if not db_member:
         raise HTTPException(status_code=404, detail="Member not found")
         
+    GymCounterRepository(db).apply_member_delta(
+        current_user.gym_id,
+        active_members=_active_delta(db_member.membership_status, 'active')
+    )
+    db_member.membership_status = 'active'
+    ResourceVersionRepository(db).bump(current_user.gym_id, ResourceVersionRepository.DASHBOARD)
+    db.commit()
+    db.refresh(db_member)
+    member_index.upsert(db_member)
+    invalidate_dashboard(current_user.gym_id)
+    return db_member
+
+@router.patch("/{member_id}/renew", response_model=MemberResponse)
+def renew_member(
+    member_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+    active: bool = Depends(verify_active_gym)
+):
+    """Renovar la membresía por un período más de su plan y registrar el ingreso"""
+    db_member = db.query(MemberModel).options(joinedload(MemberModel.membership_plan)).filter(
+        MemberModel.id == member_id,
+        MemberModel.gym_id == current_user.gym_id
+    ).first()
+    
+    if not db_member:
+        raise HTTPException(status_code=404, detail="Member not found")
+    
+    plan = db_member.membership_plan
+    duration_days = plan.duration_days if plan else 30
+    now = datetime.now()
+    
+    # Renewing early extends from the current end date, late renewals start today
+    period_start = max(now, db_member.end_date) if db_member.end_date else now
+    db_member.end_date = period_start + timedelta(days=duration_days)
+    GymCounterRepository(db).apply_member_delta(
+        current_user.gym_id,
+        active_members=_active_delta(db_member.membership_status, 'active')
+    )
     db_member.membership_status = 'active'
+    RevenueLedgerRepository(db).record(db_member, plan, 'renewal', occurred_at=now)
+    ResourceVersionRepository(db).bump(current_user.gym_id, ResourceVersionRepository.DASHBOARD)
     db.commit()
     db.refresh(db_member)
+    member_index.upsert(db_member)
+    invalidate_dashboard(current_user.gym_id)
     return db_member
@@ -3,13 +3,13 @@ from sqlalchemy.orm import Session
 from typing import List
 
 from app.infrastructure.database import get_db, UserModel
-from app.api.dependencies import get_current_user, verify_active_gym
+from app.api.dependencies import get_current_user, verify_active_gym, get_tenant_id, conditional_get
 from app.api.schemas.membership_plans import (
     MembershipPlanCreate,
     MembershipPlanUpdate,
     MembershipPlanResponse
 )
-from app.infrastructure.repositories import MembershipPlanRepository
+from app.infrastructure.repositories import MembershipPlanRepository, ResourceVersionRepository
 from app.domain.entities import MembershipPlan
 
 router = APIRouter()
@@ -18,12 +18,13 @@ router = APIRouter()
 def get_membership_plans(
     include_inactive: bool = False,
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user),
-    active: bool = Depends(verify_active_gym)
+    gym_id: int = Depends(get_tenant_id),
+    active: bool = Depends(verify_active_gym),
+    version: int = Depends(conditional_get(ResourceVersionRepository.MEMBERSHIP_PLANS))
 ):
-    """Get all membership plans for the current gym"""
+    """Get all membership plans for the current gym (ETag / If-None-Match)"""
     repo = MembershipPlanRepository(db)
-    plans = repo.get_all_by_gym(current_user.gym_id, include_inactive=include_inactive)
+    plans = repo.get_all_by_gym(gym_id, include_inactive=include_inactive)
     return plans
 
 @router.post("/", response_model=MembershipPlanResponse, status_code=status.HTTP_201_CREATED)
@@ -59,12 +60,13 @@ def create_membership_plan(
 def get_membership_plan(
     plan_id: int,
     db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user),
-    active: bool = Depends(verify_active_gym)
+    gym_id: int = Depends(get_tenant_id),
+    active: bool = Depends(verify_active_gym),
+    version: int = Depends(conditional_get(ResourceVersionRepository.MEMBERSHIP_PLANS))
 ):
-    """Get a specific membership plan"""
+    """Get a specific membership plan (ETag / If-None-Match)"""
     repo = MembershipPlanRepository(db)
-    plan = repo.get_by_id(plan_id, current_user.gym_id)
+    plan = repo.get_by_id(plan_id, gym_id)
     
     if not plan:
         raise HTTPException(status_code=404, detail="Membership plan not found")
@@ -1,13 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List
 from pydantic import BaseModel
 from datetime import datetime
-from app.infrastructure.database import get_db, NotificationModel, UserModel
-from app.api.dependencies import get_current_user
+from app.infrastructure.database import get_db, SessionLocal, NotificationModel, UserModel
+from app.infrastructure.repositories import NotificationRepository
+from app.infrastructure.notification_hub import notification_hub, publish_unread_count
+from app.api.dependencies import get_current_user, get_tenant_id, get_stream_claims, TokenClaims
+from app.api.streaming import sse_event
 
 router = APIRouter()
 
+HEARTBEAT_SECONDS = 15
+# Streams are closed after this long and EventSource reconnects on its own.
+# Bounds how long a graceful shutdown waits for open streams.
+STREAM_MAX_SECONDS = 300
+RECONNECT_MS = 3000
+
 class NotificationResponse(BaseModel):
     id: int
     title: str
@@ -21,22 +33,72 @@ class NotificationResponse(BaseModel):
 
 @router.get("/", response_model=List[NotificationResponse])
 def get_notifications(
-    current_user: UserModel = Depends(get_current_user),
+    gym_id: int = Depends(get_tenant_id),
     db: Session = Depends(get_db)
 ):
-    # Get unread notifications
-    unread = db.query(NotificationModel).filter(
-        NotificationModel.gym_id == current_user.gym_id,
-        NotificationModel.is_read == False
-    ).order_by(NotificationModel.created_at.desc()).limit(10).all()
-    
-    # Get recent read notifications
-    read = db.query(NotificationModel).filter(
-        NotificationModel.gym_id == current_user.gym_id,
-        NotificationModel.is_read == True
-    ).order_by(NotificationModel.created_at.desc()).limit(5).all()
-    
-    return unread + read
+    # Unread (10) and recent read (5) notifications in one query
+    notifications, _ = NotificationRepository(db).snapshot(gym_id)
+    return notifications
+
+def _load_snapshot(gym_id: int) -> dict:
+    db = SessionLocal()
+    try:
+        notifications, unread_count = NotificationRepository(db).snapshot(gym_id)
+    finally:
+        db.close()
+    return {
+        "notifications": [{k: v for k, v in n.items() if k != "gym_id"} for n in notifications],
+        "unread_count": unread_count
+    }
+
+async def _event_stream(request: Request, gym_id: int):
+    subscription = notification_hub.subscribe(gym_id)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + STREAM_MAX_SECONDS
+    try:
+        # Subscribed before loading, so nothing created in between is missed
+        yield f"retry: {RECONNECT_MS}\n\n"
+        yield sse_event("snapshot", await run_in_threadpool(_load_snapshot, gym_id))
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), min(HEARTBEAT_SECONDS, remaining))
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keep-alive\n\n"
+                continue
+            if event is None:
+                break
+            name, data = event
+            if name == "resync":
+                yield sse_event("snapshot", await run_in_threadpool(_load_snapshot, gym_id))
+            else:
+                yield sse_event(name, data)
+    finally:
+        notification_hub.unsubscribe(subscription)
+
+@router.get("/stream")
+def stream_notifications(
+    request: Request,
+    claims: TokenClaims = Depends(get_stream_claims)
+):
+    """Canal SSE de notificaciones del gimnasio.
+
+    Envía primero un evento `snapshot` (notificaciones y total sin leer, una
+    sola consulta) y luego `notification` y `unread_count` a medida que
+    ocurren. El token puede ir en ?access_token= porque EventSource no
+    permite enviar headers.
+    """
+    if not claims.gym_active:
+        raise HTTPException(status_code=403, detail="Suscripción inactiva. Por favor, completa el pago.")
+    return StreamingResponse(
+        _event_stream(request, claims.gym_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.post("/{id}/mark-read")
 def mark_notification_read(
@@ -54,5 +116,6 @@ def mark_notification_read(
         
     notification.is_read = True
     db.commit()
+    publish_unread_count(db, current_user.gym_id)
     
     return {"message": "Notification marked as read"}
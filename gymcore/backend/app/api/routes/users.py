@@ -5,6 +5,7 @@ from app.api.dependencies import get_current_user
 from app.api.schemas.users import UserUpdateRequest
 from app.api.schemas.auth import UserResponse
 from app.infrastructure.repositories import UserRepository
+from app.infrastructure.cache import invalidate_user
 
 router = APIRouter()
 
@@ -15,6 +16,7 @@ def update_user_me(
     db: Session = Depends(get_db)
 ):
     user_repo = UserRepository(db)
+    previous_email = current_user.email
     
     # Validate email uniqueness if changed
     if request.email and request.email != current_user.email:
@@ -30,6 +32,7 @@ def update_user_me(
         current_user.full_name = request.full_name
     
     db.commit()
+    invalidate_user(previous_email)
     db.refresh(current_user)
     
     return current_user
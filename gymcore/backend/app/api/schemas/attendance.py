@@ -1,6 +1,6 @@
-from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import date, datetime
 
 class AttendanceCheckIn(BaseModel):
     dni: str
@@ -11,11 +11,41 @@ class AttendanceResponse(BaseModel):
     member_name: str
     member_dni: str
     check_in_time: datetime
+    provisional: bool = False  # True while the row waits in the write buffer
     
     class Config:
         from_attributes = True
 
+class AttendanceScan(BaseModel):
+    dni: str
+    scanned_at: datetime
+
+class AttendanceBatchCheckIn(BaseModel):
+    records: List[AttendanceScan] = Field(max_length=5000)
+
+class AttendanceBatchResult(BaseModel):
+    index: int
+    dni: str
+    status: str  # 'ok'|'not_found'|'future'|'before_start'|'inactive'|'expired'
+    attendance_id: Optional[int] = None
+    member_id: Optional[int] = None
+    member_name: Optional[str] = None
+
+class AttendanceBatchResponse(BaseModel):
+    accepted: int
+    rejected: int
+    results: List[AttendanceBatchResult]
+
 class AttendanceStats(BaseModel):
     today_count: int
     week_count: int
     month_count: int
+
+class AttendanceTimeseriesPoint(BaseModel):
+    date: date
+    hour: Optional[int] = None
+    count: int
+
+class OccupancyResponse(BaseModel):
+    occupancy: int  # Distinct members checked in within the window
+    window_minutes: int
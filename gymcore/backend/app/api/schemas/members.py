@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class MembershipPlanInfo(BaseModel):
@@ -44,3 +44,14 @@ class MemberResponse(MemberBase):
 
     class Config:
         from_attributes = True
+
+class MemberImportError(BaseModel):
+    line: int
+    dni: Optional[str] = None
+    error: str
+
+class MemberImportResponse(BaseModel):
+    processed: int
+    created: int
+    failed: int
+    errors: List[MemberImportError]
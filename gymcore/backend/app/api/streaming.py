@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import BinaryIO, Iterable, Iterator, Optional, Sequence, Tuple
+from fastapi.responses import StreamingResponse
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _ndjson_lines(rows: Iterable[Sequence], fields: Sequence[str]):
+    for row in rows:
+        yield json.dumps(dict(zip(fields, row)), default=_json_default, ensure_ascii=False) + "\n"
+
+def _csv_lines(rows: Iterable[Sequence], fields: Sequence[str]):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for row in rows:
+        writer.writerow([value.isoformat() if isinstance(value, (datetime, date)) else value for value in row])
+        if buffer.tell() > 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def stream_rows(rows: Iterable[Sequence], fields: Sequence[str], fmt: str, filename: str) -> StreamingResponse:
+    """Stream plain row tuples as NDJSON or CSV without building response models."""
+    if fmt == "csv":
+        return StreamingResponse(
+            _csv_lines(rows, fields),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.csv"'}
+        )
+    return StreamingResponse(_ndjson_lines(rows, fields), media_type="application/x-ndjson")
+
+def read_rows(file: BinaryIO, fmt: str) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Parse an uploaded CSV (with header) or NDJSON file incrementally.
+
+    Yields (line, record, error): exactly one of record/error is set. Empty
+    CSV cells become None.
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(text)
+            for record in reader:
+                yield reader.line_num, {
+                    key.strip(): (value.strip() or None) if isinstance(value, str) else value
+                    for key, value in record.items() if key
+                }, None
+            return
+        for line, raw in enumerate(text, start=1):
+            if not raw.strip():
+                continue
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                yield line, None, "JSON inválido"
+                continue
+            if not isinstance(record, dict):
+                yield line, None, "Se esperaba un objeto JSON"
+                continue
+            yield line, record, None
+    finally:
+        text.detach()
+
+def json_message(data) -> str:
+    """JSON text for push channels (SSE, WebSocket); dates as ISO 8601."""
+    return json.dumps(data, default=_json_default, ensure_ascii=False)
+
+def sse_event(event: str, data) -> str:
+    """One Server-Sent Events frame with a JSON payload."""
+    return f"event: {event}\ndata: {json_message(data)}\n\n"
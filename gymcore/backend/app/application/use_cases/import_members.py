@@ -0,0 +1,119 @@
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import Iterable, List, Optional, Tuple
+from datetime import datetime, timedelta
+from pydantic import BaseModel, EmailStr, ValidationError
+from app.infrastructure.repositories import MemberRepository, MembershipPlanRepository
+
+DEFAULT_DURATION_DAYS = 30
+
+class MemberImportRow(BaseModel):
+    """One row of an import file, validated before it joins a chunk."""
+    full_name: str
+    dni: str
+    email: EmailStr
+    phone: str
+    membership_type: Optional[str] = None
+    plan_id: Optional[int] = None
+    plan: Optional[str] = None  # Plan name, alternative to plan_id
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+
+def _validation_message(exc: ValidationError) -> str:
+    # Reported to the gym as is, so in Spanish like the other row errors
+    first = exc.errors()[0]
+    field = ".".join(str(part) for part in first["loc"])
+    if not field:
+        return "Fila inválida"
+    # Empty CSV cells arrive as None
+    missing = first["type"] == "missing" or first.get("input") is None
+    return f"{field}: {'campo obligatorio' if missing else 'valor inválido'}"
+
+class ImportMembersUseCase:
+    """Bulk member import for onboarding a gym.
+
+    Rows are processed in chunks: one query resolves the chunk's plans, one
+    finds DNIs already taken, and the valid rows go in with a single
+    executemany insert and commit. A failing row is reported and skipped,
+    never aborting the rest of the file.
+    """
+
+    def __init__(self, db: Session, chunk_size: int = 500):
+        self.member_repo = MemberRepository(db)
+        self.plan_repo = MembershipPlanRepository(db)
+        self.chunk_size = chunk_size
+
+    def execute(self, gym_id: int, records: Iterable[Tuple[int, Optional[dict], Optional[str]]]) -> dict:
+        result = {"processed": 0, "created": 0, "failed": 0, "errors": []}
+        seen_dnis = set()
+        chunk: List[Tuple[int, MemberImportRow]] = []
+        for line, record, error in records:
+            result["processed"] += 1
+            if error is None:
+                try:
+                    row = MemberImportRow(**record)
+                except ValidationError as exc:
+                    error = _validation_message(exc)
+                except TypeError:
+                    error = "Fila inválida"
+            if error is None and row.dni in seen_dnis:
+                error = "DNI repetido en el archivo"
+            if error is not None:
+                self._fail(result, line, record.get("dni") if record else None, error)
+                continue
+            seen_dnis.add(row.dni)
+            chunk.append((line, row))
+            if len(chunk) >= self.chunk_size:
+                self._import_chunk(gym_id, chunk, result)
+                chunk = []
+        if chunk:
+            self._import_chunk(gym_id, chunk, result)
+        result["errors"].sort(key=lambda item: item["line"])
+        return result
+
+    def _fail(self, result: dict, line: int, dni: Optional[str], error: str) -> None:
+        result["failed"] += 1
+        result["errors"].append({"line": line, "dni": dni, "error": error})
+
+    def _import_chunk(self, gym_id: int, chunk: List[Tuple[int, MemberImportRow]], result: dict) -> None:
+        plans = self.plan_repo.resolve(
+            gym_id,
+            [row.plan_id for _, row in chunk if row.plan_id is not None],
+            [row.plan for _, row in chunk if row.plan]
+        )
+        plans_by_id = {plan.id: plan for plan in plans}
+        plans_by_name = {plan.name: plan for plan in plans}
+        taken = self.member_repo.existing_dnis([row.dni for _, row in chunk])
+
+        values = []
+        lines = {row.dni: line for line, row in chunk}
+        now = datetime.now()
+        for line, row in chunk:
+            if row.dni in taken:
+                self._fail(result, line, row.dni, "Ya existe un socio con ese DNI")
+                continue
+            plan = None
+            if row.plan_id is not None or row.plan:
+                plan = plans_by_id.get(row.plan_id) if row.plan_id is not None else plans_by_name.get(row.plan)
+                if plan is None:
+                    self._fail(result, line, row.dni, "Plan de membresía no encontrado")
+                    continue
+            start_date = row.start_date or now
+            duration_days = plan.duration_days if plan else DEFAULT_DURATION_DAYS
+            values.append({
+                "plan_id": plan.id if plan else None,
+                "full_name": row.full_name,
+                "dni": row.dni,
+                "email": row.email,
+                "phone": row.phone,
+                "membership_type": row.membership_type,
+                "start_date": start_date,
+                "end_date": row.end_date or start_date + timedelta(days=duration_days)
+            })
+        try:
+            result["created"] += len(self.member_repo.bulk_create(gym_id, values, plans_by_id))
+        except IntegrityError:
+            # A DNI was taken concurrently; nothing from this chunk was written
+            self.member_repo.db.rollback()
+            for value in values:
+                self._fail(result, lines[value["dni"]], value["dni"], "Conflicto de DNI al insertar, reintentar")
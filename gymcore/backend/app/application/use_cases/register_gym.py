@@ -1,7 +1,6 @@
 from sqlalchemy.orm import Session
 from app.domain.entities import Gym, User
 from app.infrastructure.repositories import GymRepository, UserRepository
-from app.core.security import get_password_hash
 
 class RegisterGymUseCase:
     def __init__(self, db: Session):
@@ -14,9 +13,7 @@ class RegisterGymUseCase:
         created_gym = self.gym_repo.create(gym_data)
         
         # Create Admin User
-        # Ensure password is hashed
-        hashed_pwd = get_password_hash(admin_data.hashed_password)
-        admin_data.hashed_password = hashed_pwd
+        # admin_data.hashed_password already holds the bcrypt hash (hashed by the caller)
         admin_data.gym_id = created_gym.id
         
         created_admin = self.user_repo.create(admin_data)
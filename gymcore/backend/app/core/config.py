@@ -7,6 +7,29 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     DATABASE_URL: str
     CORS_ORIGINS: str = '["http://localhost:3000"]'
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 1024
+    AUTH_CLAIMS_FAST_PATH: bool = False
+    AUTH_EPOCH_CACHE_TTL_SECONDS: int = 5
+    JWT_CACHE_MAX_SIZE: int = 4096
+    MEMBER_INDEX_TTL_SECONDS: int = 300
+    MEMBER_INDEX_RECHECK_REJECTIONS: bool = False
+    DASHBOARD_CACHE_TTL_SECONDS: int = 60
+    DASHBOARD_BOOTSTRAP_MAX_SESSIONS: int = 4
+    ATTENDANCE_BUFFERED_WRITES: bool = False
+    ATTENDANCE_FLUSH_INTERVAL_MS: int = 200
+    ATTENDANCE_FLUSH_MAX_ROWS: int = 100
+    ATTENDANCE_FLUSH_MAX_ATTEMPTS: int = 3
+    ATTENDANCE_SCAN_CLOCK_SKEW_SECONDS: int = 300
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 8
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS: float = 0.5
+    PLATFORM_METRICS_RECONCILE_SECONDS: int = 3600
+    MEMBERSHIP_SWEEP_INTERVAL_SECONDS: int = 300
+    MEMBERSHIP_SWEEP_BATCH_SIZE: int = 1000
+    NOTIFICATION_SCHEDULE_INTERVAL_SECONDS: int = 3600
+    OCCUPANCY_WINDOW_MINUTES: int = 90
+    OCCUPANCY_RELOAD_SECONDS: int = 60
     
     class Config:
         env_file = ".env"
@@ -1,20 +1,123 @@
 from passlib.context import CryptContext
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
+import asyncio
+import hashlib
+import threading
+import time
 from jose import jwt
+from app.core.cache import TTLCache
 from app.core.config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+class PasswordHasherBusy(Exception):
+    """Raised when the bcrypt pool is saturated and the caller should retry later."""
+
+class PasswordHasher:
+    """Runs bcrypt on a dedicated, bounded thread pool.
+
+    bcrypt releases the GIL, so a small pool gives real parallelism while
+    capping how many request threads can be tied up waiting on it. Callers
+    beyond `max_pending` wait at most `queue_timeout` seconds and are then
+    rejected with PasswordHasherBusy instead of piling up.
+
+    Async route handlers use `run_async`, which waits on an asyncio
+    semaphore and awaits the pool's future, so neither the queue wait nor
+    the hash holds a request thread. `run` blocks its caller and is meant for
+    sync code outside the request path (scripts, use cases). Each has its
+    own `max_pending` budget.
+    """
+
+    def __init__(self, workers: int, max_pending: int, queue_timeout: float):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._async_slots = asyncio.Semaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+
+    def _run(self, fn, submitted_at: float, *args):
+        with self._lock:
+            self._running += 1
+            self._total_wait += time.monotonic() - submitted_at
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+
+    def run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self._rejected += 1
+            raise PasswordHasherBusy()
+        with self._lock:
+            self._pending += 1
+        try:
+            return self._executor.submit(self._run, fn, time.monotonic(), *args).result()
+        finally:
+            with self._lock:
+                self._pending -= 1
+            self._slots.release()
+
+    async def run_async(self, fn, *args):
+        try:
+            await asyncio.wait_for(self._async_slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._rejected += 1
+            raise PasswordHasherBusy()
+        with self._lock:
+            self._pending += 1
+        try:
+            return await asyncio.wrap_future(self._executor.submit(self._run, fn, time.monotonic(), *args))
+        finally:
+            with self._lock:
+                self._pending -= 1
+            self._async_slots.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_queue_wait_ms": round(self._total_wait / self._completed * 1000, 2) if self._completed else 0.0
+            }
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    queue_timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS
+)
+
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.run(pwd_context.verify, plain_password, hashed_password)
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_hasher.run(pwd_context.hash, password)
 
 def get_password_hash(password):
     return hash_password(password)
 
+async def verify_password_async(plain_password, hashed_password):
+    return await password_hasher.run_async(pwd_context.verify, plain_password, hashed_password)
+
+async def hash_password_async(password: str) -> str:
+    return await password_hasher.run_async(pwd_context.hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -25,9 +128,18 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+# Verified payloads keyed by token digest; each entry lives until the token's `exp`.
+token_cache = TTLCache("jwt_payloads", max_size=settings.JWT_CACHE_MAX_SIZE)
+
 def decode_access_token(token: str) -> dict:
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        return dict(payload)
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
     except jwt.JWTError:
         return None
+    if "exp" in payload:
+        token_cache.set(key, dict(payload), ttl_seconds=payload["exp"] - time.time())
+    return payload
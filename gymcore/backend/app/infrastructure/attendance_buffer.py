@@ -0,0 +1,180 @@
+import itertools
+import sys
+import threading
+import traceback
+from datetime import datetime
+from collections import defaultdict, deque
+from typing import List, Optional, Tuple
+from sqlalchemy.exc import OperationalError
+from app.core.config import settings
+from app.infrastructure.database import SessionLocal
+from app.infrastructure.repositories import AttendanceRepository
+from app.infrastructure.checkin_feed import publish_check_ins
+
+class AttendanceWriteBuffer:
+    """Group-commit buffer for check-ins.
+
+    `submit` acknowledges a check-in immediately with a negative provisional
+    id. A background thread writes the queued rows in a single transaction
+    every `flush_interval_ms`, or as soon as `max_rows` are waiting. `stop`
+    drains whatever is left, so it must run on application shutdown. Flushed
+    rows reach the live check-in feed with their real ids.
+
+    If a batch fails, its rows are retried one by one so a single bad row
+    (e.g. a member deleted before the flush) cannot block the rest. A row
+    that fails `max_attempts` flushes is dead-lettered: logged, counted and
+    kept in `stats()`. Rows held back by an unreachable database are retried
+    without counting against them.
+    """
+
+    DEAD_LETTERS_KEPT = 100
+
+    def __init__(self, flush_interval_ms: int, max_rows: int, max_attempts: int):
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_rows = max_rows
+        self.max_attempts = max_attempts
+        # Each queued check-in: {"row", "member_name", "member_dni", "attempts"}
+        self._pending: List[dict] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._provisional_ids = itertools.count(-1, -1)
+        self.flushed_rows = 0
+        self.batches = 0
+        self.failures = 0
+        self.dead_lettered = 0
+        self.dead_letters = deque(maxlen=self.DEAD_LETTERS_KEPT)
+
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="attendance-flusher", daemon=True)
+            self._thread.start()
+
+    def submit(self, member_id: int, gym_id: int, check_in_time: datetime,
+               member_name: Optional[str] = None, member_dni: Optional[str] = None) -> int:
+        with self._lock:
+            self._ensure_started()
+            provisional_id = next(self._provisional_ids)
+            self._pending.append({
+                "row": {
+                    "member_id": member_id,
+                    "gym_id": gym_id,
+                    "check_in_time": check_in_time
+                },
+                "member_name": member_name,
+                "member_dni": member_dni,
+                "attempts": 0
+            })
+            if len(self._pending) >= self.max_rows:
+                self._wakeup.set()
+        return provisional_id
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    @staticmethod
+    def _insert(rows: List[dict]) -> List[int]:
+        db = SessionLocal()
+        try:
+            return AttendanceRepository(db).bulk_check_in(rows)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _insert_each(self, pending: List[dict]) -> Tuple[List[tuple], List[dict]]:
+        """Write rows one per transaction. Returns (written (item, id) pairs, items to retry)."""
+        written, retry = [], []
+        for position, item in enumerate(pending):
+            try:
+                written.append((item, self._insert([item["row"]])[0]))
+            except OperationalError:
+                # The database is unavailable, not the row: keep the rest as they are
+                traceback.print_exc()
+                retry.extend(pending[position:])
+                break
+            except Exception as exc:
+                item["attempts"] += 1
+                if item["attempts"] >= self.max_attempts:
+                    self._dead_letter(item, exc)
+                else:
+                    retry.append(item)
+        return written, retry
+
+    def _dead_letter(self, item: dict, error: Exception) -> None:
+        entry = {**item["row"], "member_dni": item["member_dni"], "attempts": item["attempts"], "error": repr(error)}
+        self.dead_letters.append(entry)
+        self.dead_lettered += 1
+        print(f"⚠️  Asistencia descartada del buffer tras {item['attempts']} intentos: {entry}", file=sys.stderr)
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if not pending:
+                return 0
+            try:
+                written = list(zip(pending, self._insert([item["row"] for item in pending])))
+            except Exception:
+                self.failures += 1
+                traceback.print_exc()
+                written, retry = self._insert_each(pending)
+                if retry:
+                    with self._lock:
+                        self._pending[:0] = retry
+            by_gym = defaultdict(list)
+            for item, attendance_id in written:
+                row = item["row"]
+                by_gym[row["gym_id"]].append({
+                    "id": attendance_id,
+                    "member_id": row["member_id"],
+                    "member_name": item["member_name"],
+                    "member_dni": item["member_dni"],
+                    "check_in_time": row["check_in_time"]
+                })
+            for gym_id, check_ins in by_gym.items():
+                publish_check_ins(gym_id, check_ins)
+            if written:
+                self.flushed_rows += len(written)
+                self.batches += 1
+            return len(written)
+
+    def stop(self) -> None:
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        with self._lock:
+            unwritten, self._pending = self._pending, []
+        # Last chance to record them: the process is going away
+        for item in unwritten:
+            self._dead_letter(item, RuntimeError("not written before shutdown"))
+        self._stopping = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "enabled": settings.ATTENDANCE_BUFFERED_WRITES,
+            "pending": pending,
+            "flushed_rows": self.flushed_rows,
+            "batches": self.batches,
+            "failures": self.failures,
+            "dead_lettered": self.dead_lettered,
+            "dead_letters": list(self.dead_letters),
+            "avg_batch_size": round(self.flushed_rows / self.batches, 2) if self.batches else 0.0
+        }
+
+attendance_buffer = AttendanceWriteBuffer(
+    flush_interval_ms=settings.ATTENDANCE_FLUSH_INTERVAL_MS,
+    max_rows=settings.ATTENDANCE_FLUSH_MAX_ROWS,
+    max_attempts=settings.ATTENDANCE_FLUSH_MAX_ATTEMPTS
+)
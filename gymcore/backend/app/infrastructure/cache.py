@@ -0,0 +1,79 @@
+from typing import Optional
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.infrastructure.database import UserModel, GymAuthEpochModel
+
+# Resolved user+gym snapshots keyed by token subject (the user's email).
+user_cache = TTLCache(
+    "users",
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS
+)
+
+# Current revocation epoch per gym, checked by the claims-only auth path.
+epoch_cache = TTLCache(
+    "auth_epochs",
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl_seconds=settings.AUTH_EPOCH_CACHE_TTL_SECONDS
+)
+
+# Per-gym (dashboard version, stats) snapshots, dropped on member and plan writes.
+dashboard_cache = TTLCache(
+    "dashboard_stats",
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl_seconds=settings.DASHBOARD_CACHE_TTL_SECONDS
+)
+
+# Per-gym member counts by status for list totals, dropped with the dashboard snapshot.
+member_totals_cache = TTLCache(
+    "member_totals",
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl_seconds=settings.DASHBOARD_CACHE_TTL_SECONDS
+)
+
+def _detached_copy(instance):
+    mapper = inspect(instance).mapper
+    values = {attr.key: getattr(instance, attr.key) for attr in mapper.column_attrs}
+    return mapper.class_(**values)
+
+def snapshot_user(user: UserModel) -> UserModel:
+    """Build a detached, session-independent copy of a user and its gym."""
+    snapshot = _detached_copy(user)
+    if user.gym is not None:
+        gym = _detached_copy(user.gym)
+        make_transient_to_detached(gym)
+        set_committed_value(snapshot, "gym", gym)
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+def get_cached_user(db: Session, email: str) -> Optional[UserModel]:
+    """Attach the cached snapshot for `email` to `db` without querying."""
+    snapshot = user_cache.get(email)
+    if snapshot is None:
+        return None
+    return db.merge(snapshot, load=False)
+
+def cache_user(user: UserModel) -> None:
+    user_cache.set(user.email, snapshot_user(user))
+
+def invalidate_user(email: str) -> None:
+    user_cache.delete(email)
+
+def get_gym_epoch(db: Session, gym_id: int) -> int:
+    epoch = epoch_cache.get(gym_id)
+    if epoch is None:
+        epoch = db.query(GymAuthEpochModel.epoch).filter(GymAuthEpochModel.gym_id == gym_id).scalar() or 0
+        epoch_cache.set(gym_id, epoch)
+    return epoch
+
+def invalidate_gym(gym_id: int) -> None:
+    user_cache.delete_where(lambda email, user: user.gym_id == gym_id)
+    epoch_cache.delete(gym_id)
+
+def invalidate_dashboard(gym_id: int) -> None:
+    """Drop the gym's cached member aggregates: dashboard stats and list totals."""
+    dashboard_cache.delete(gym_id)
+    member_totals_cache.delete(gym_id)
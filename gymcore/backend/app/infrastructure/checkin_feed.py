@@ -0,0 +1,124 @@
+import heapq
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.infrastructure.event_hub import EventHub
+from app.infrastructure.repositories import AttendanceRepository
+
+class OccupancyWindow:
+    """Sliding-window occupancy: distinct members checked in within the last `window_minutes`.
+
+    Per gym it keeps a min-heap of (check_in_time, member_id) plus a count per
+    member, so recording a check-in and expiring old ones cost O(log n). A
+    gym's window is loaded from the database when first read and reloaded
+    after `reload_seconds`, which bounds drift from check-ins made by other
+    worker processes (the hub only hears about this one). Check-ins recorded
+    while a load runs are replayed onto it, so none committed between its
+    SELECT and the install are lost; one the SELECT also saw is counted
+    once, since occupancy counts distinct members.
+    """
+
+    def __init__(self, window_minutes: int, reload_seconds: float):
+        self.window = timedelta(minutes=window_minutes)
+        self.reload_seconds = reload_seconds
+        self._entries: Dict[int, List[Tuple[datetime, int]]] = {}
+        self._members: Dict[int, Counter] = {}
+        self._expires: Dict[int, float] = {}
+        # Gyms being loaded: check-ins recorded meanwhile, and how many loads are running
+        self._recorded: Dict[int, List[Tuple[datetime, int]]] = {}
+        self._loaders = Counter()
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def _expire(self, gym_id: int, now: datetime) -> None:
+        entries, members = self._entries[gym_id], self._members[gym_id]
+        cutoff = now - self.window
+        while entries and entries[0][0] < cutoff:
+            _, member_id = heapq.heappop(entries)
+            members[member_id] -= 1
+            if not members[member_id]:
+                del members[member_id]
+
+    def _load(self, db: Session, gym_id: int, now: datetime) -> None:
+        with self._lock:
+            self._loaders[gym_id] += 1
+            self._recorded.setdefault(gym_id, [])
+        entries = None
+        try:
+            entries = [tuple(row) for row in AttendanceRepository(db).get_member_check_ins_since(gym_id, now - self.window)]
+        finally:
+            with self._lock:
+                recorded = self._recorded[gym_id]
+                self._loaders[gym_id] -= 1
+                if not self._loaders[gym_id]:
+                    del self._loaders[gym_id]
+                    del self._recorded[gym_id]
+                if entries is not None:
+                    entries.extend(recorded)
+                    heapq.heapify(entries)
+                    self._entries[gym_id] = entries
+                    self._members[gym_id] = Counter(member_id for _, member_id in entries)
+                    self._expires[gym_id] = time.monotonic() + self.reload_seconds
+                    self.loads += 1
+
+    def count(self, db: Session, gym_id: int) -> int:
+        now = datetime.now()
+        with self._lock:
+            fresh = self._expires.get(gym_id, 0) > time.monotonic()
+        if not fresh:
+            self._load(db, gym_id, now)
+        with self._lock:
+            self._expire(gym_id, now)
+            return len(self._members[gym_id])
+
+    def record(self, gym_id: int, member_id: int, check_in_time: datetime) -> None:
+        with self._lock:
+            if check_in_time < datetime.now() - self.window:
+                return
+            if gym_id in self._recorded:
+                self._recorded[gym_id].append((check_in_time, member_id))
+            if gym_id in self._entries:
+                heapq.heappush(self._entries[gym_id], (check_in_time, member_id))
+                self._members[gym_id][member_id] += 1
+
+    def peek(self, gym_id: int) -> int:
+        """Current count without touching the database; 0 for a gym not loaded yet."""
+        with self._lock:
+            if gym_id not in self._entries:
+                return 0
+            self._expire(gym_id, datetime.now())
+            return len(self._members[gym_id])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "window_minutes": int(self.window.total_seconds() // 60),
+                "reload_seconds": self.reload_seconds,
+                "gyms": len(self._entries),
+                "entries": sum(len(entries) for entries in self._entries.values()),
+                "loads": self.loads
+            }
+
+checkin_hub = EventHub()
+occupancy = OccupancyWindow(settings.OCCUPANCY_WINDOW_MINUTES, settings.OCCUPANCY_RELOAD_SECONDS)
+
+def publish_check_ins(gym_id: int, check_ins: List[dict]) -> None:
+    """Record committed check-ins in the occupancy window and push today's to the gym's live feeds.
+
+    Each check-in is a dict with id, member_id, member_name, member_dni and
+    check_in_time.
+    """
+    check_ins = sorted(check_ins, key=lambda item: (item["check_in_time"], item["id"]))
+    for item in check_ins:
+        occupancy.record(gym_id, item["member_id"], item["check_in_time"])
+    # Offline scans synced late may belong to earlier days; the feed mirrors /attendance/today
+    today = datetime.now().date()
+    check_ins = [item for item in check_ins if item["check_in_time"].date() == today]
+    if check_ins and checkin_hub.has_subscribers(gym_id):
+        count = occupancy.peek(gym_id)
+        for item in check_ins:
+            checkin_hub.publish(gym_id, "check_in", {"check_in": item, "occupancy": count})
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime, ForeignKey, Float, Text
+from sqlalchemy import create_engine, Column, Integer, String, Boolean, Date, DateTime, ForeignKey, Float, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
@@ -67,6 +67,13 @@ class MembershipPlanModel(Base):
 
 class MemberModel(Base):
     __tablename__ = "members"
+    __table_args__ = (
+        Index("ix_members_gym_status", "gym_id", "membership_status"),
+        Index("ix_members_gym_dni", "gym_id", "dni"),
+        Index("ix_members_gym_created_at", "gym_id", "created_at"),
+        Index("ix_members_gym_full_name", "gym_id", "full_name"),
+        Index("ix_members_status_end_date", "membership_status", "end_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     gym_id = Column(Integer, ForeignKey("gyms.id"))
@@ -88,6 +95,9 @@ class MemberModel(Base):
 
 class SubscriptionModel(Base):
     __tablename__ = "subscriptions"
+    __table_args__ = (
+        Index("ix_subscriptions_gym_status", "gym_id", "status"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     gym_id = Column(Integer, ForeignKey("gyms.id"))
@@ -101,6 +111,21 @@ class SubscriptionModel(Base):
 
     gym = relationship("GymModel", back_populates="subscriptions")
 
+class GymAuthEpochModel(Base):
+    __tablename__ = "gym_auth_epochs"
+    gym_id = Column(Integer, ForeignKey("gyms.id"), primary_key=True)
+    epoch = Column(Integer, default=0)  # Bumped to revoke claims issued in earlier epochs
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ResourceVersionModel(Base):
+    """Per-gym version of slow-changing resources, bumped by their writes; backs ETags."""
+    __tablename__ = "resource_versions"
+
+    gym_id = Column(Integer, ForeignKey("gyms.id"), primary_key=True)
+    resource = Column(String(50), primary_key=True)  # 'membership_plans', 'gym_profile', 'invoices', 'dashboard'
+    version = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class PaymentMethodModel(Base):
     __tablename__ = "payment_methods"
     id = Column(Integer, primary_key=True, index=True)
@@ -123,6 +148,9 @@ class PasswordResetTokenModel(Base):
 
 class AttendanceModel(Base):
     __tablename__ = "attendances"
+    __table_args__ = (
+        Index("ix_attendances_gym_check_in_time", "gym_id", "check_in_time"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     member_id = Column(Integer, ForeignKey("members.id"))
@@ -133,8 +161,64 @@ class AttendanceModel(Base):
     member = relationship("MemberModel", back_populates="attendances")
     gym = relationship("GymModel")
 
+class GymCounterModel(Base):
+    """Per-gym counters kept in step with member and attendance writes."""
+    __tablename__ = "gym_counters"
+
+    gym_id = Column(Integer, ForeignKey("gyms.id"), primary_key=True)
+    members = Column(Integer, default=0, nullable=False)
+    active_members = Column(Integer, default=0, nullable=False)
+    attendances_today = Column(Integer, default=0, nullable=False)
+    attendances_date = Column(Date, nullable=True)  # Day attendances_today refers to
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class PlatformMetricsModel(Base):
+    """Single-row SaaS-wide totals for the superadmin panel, kept in step with gym, member and subscription writes."""
+    __tablename__ = "platform_metrics"
+
+    id = Column(Integer, primary_key=True)  # Always 1
+    total_gyms = Column(Integer, default=0, nullable=False)
+    active_gyms = Column(Integer, default=0, nullable=False)
+    total_members = Column(Integer, default=0, nullable=False)
+    active_members = Column(Integer, default=0, nullable=False)
+    new_gyms_this_month = Column(Integer, default=0, nullable=False)
+    new_gyms_period = Column(String(7), nullable=True)  # YYYY-MM new_gyms_this_month refers to
+    active_revenue = Column(Float, default=0.0, nullable=False)
+    reconciled_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class AttendanceHourlyModel(Base):
+    """Check-ins per gym and hour, maintained in the same transaction as each insert."""
+    __tablename__ = "attendance_hourly"
+
+    gym_id = Column(Integer, ForeignKey("gyms.id"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    hour = Column(Integer, primary_key=True)
+    check_ins = Column(Integer, default=0, nullable=False)
+
+class RevenueLedgerModel(Base):
+    """Append-only record of membership revenue; `period` (YYYY-MM) drives the monthly aggregate."""
+    __tablename__ = "revenue_ledger"
+    __table_args__ = (
+        Index("ix_revenue_ledger_gym_period", "gym_id", "period"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    gym_id = Column(Integer, ForeignKey("gyms.id"))
+    member_id = Column(Integer, ForeignKey("members.id"))
+    plan_id = Column(Integer, ForeignKey("membership_plans.id"), nullable=True)
+    kind = Column(String(20))  # 'new'|'renewal'
+    amount = Column(Float)
+    period = Column(String(7))
+    occurred_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 class NotificationModel(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index("ix_notifications_gym_is_read_created_at", "gym_id", "is_read", "created_at"),
+        Index("ux_notifications_gym_dedupe_key", "gym_id", "dedupe_key", unique=True),
+    )
     id = Column(Integer, primary_key=True, index=True)
     gym_id = Column(Integer, ForeignKey("gyms.id"))
     title = Column(String(255))
@@ -142,3 +226,4 @@ class NotificationModel(Base):
     type = Column(String(50))  # 'info', 'warning', 'success', 'error'
     is_read = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    dedupe_key = Column(String(100), nullable=True)  # Condition + period, for generated notifications
@@ -0,0 +1,78 @@
+import asyncio
+import threading
+from typing import Any, Dict, Optional, Set, Tuple
+
+# (name, data); None ends the stream
+Event = Optional[Tuple[str, Any]]
+
+class Subscription:
+    """One connected client: a bounded queue living on the client's event loop."""
+
+    def __init__(self, gym_id: int, loop: asyncio.AbstractEventLoop, max_pending: int):
+        self.gym_id = gym_id
+        self.loop = loop
+        self.queue: "asyncio.Queue[Event]" = asyncio.Queue(maxsize=max_pending)
+
+    def deliver(self, event: Event) -> bool:
+        """Runs on the subscriber's loop. On overflow the backlog is replaced by a resync request."""
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(("resync", None) if event is not None else None)
+            return False
+
+class EventHub:
+    """In-process fan-out of events to a gym's open streams.
+
+    `publish` may be called from any thread (sync routes, background jobs);
+    delivery is handed to each subscriber's event loop. A client that falls
+    `max_pending` events behind gets a single 'resync' instead, and reloads
+    the snapshot. Only clients connected to this process are reached.
+    """
+
+    def __init__(self, max_pending: int = 100):
+        self.max_pending = max_pending
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, gym_id: int) -> Subscription:
+        subscription = Subscription(gym_id, asyncio.get_running_loop(), self.max_pending)
+        with self._lock:
+            self._subscribers.setdefault(gym_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.gym_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.gym_id]
+
+    def has_subscribers(self, gym_id: int) -> bool:
+        return gym_id in self._subscribers
+
+    def _send(self, subscriptions, event: Event) -> None:
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # Loop already closed: the stream is gone
+                self.unsubscribe(subscription)
+
+    def publish(self, gym_id: int, event: str, data: Any) -> None:
+        with self._lock:
+            subscriptions = list(self._subscribers.get(gym_id, ()))
+        if subscriptions:
+            self.published += 1
+            self._send(subscriptions, (event, data))
+
+    def stats(self) -> dict:
+        with self._lock:
+            gyms = len(self._subscribers)
+            connections = sum(len(subs) for subs in self._subscribers.values())
+        return {"gyms": gyms, "connections": connections, "published": self.published}
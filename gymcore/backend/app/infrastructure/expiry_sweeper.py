@@ -0,0 +1,56 @@
+from collections import Counter
+from datetime import datetime
+from app.core.config import settings
+from app.infrastructure.database import SessionLocal
+from app.infrastructure.repositories import MemberRepository
+from app.infrastructure.member_index import member_index
+from app.infrastructure.cache import invalidate_dashboard
+from app.infrastructure.scheduler import PeriodicJob
+
+class MembershipExpirySweeper(PeriodicJob):
+    """Background job that moves memberships past their end_date to 'expired'.
+
+    Every `interval_seconds` it runs batched set-based UPDATEs across all
+    gyms until nothing is due, then drops the derived state of the gyms it
+    touched. Running it in several worker processes is safe: the UPDATE only
+    matches rows that are still 'active'.
+    """
+
+    thread_name = "membership-expiry-sweeper"
+
+    def __init__(self, interval_seconds: int, batch_size: int):
+        super().__init__(interval_seconds)
+        self.batch_size = batch_size
+        self.expired = 0
+
+    def run_once(self) -> Counter:
+        return self.sweep()
+
+    def sweep(self) -> Counter:
+        """Expire every due membership now. Returns expired members per gym."""
+        now = datetime.now()
+        expired = Counter()
+        db = SessionLocal()
+        try:
+            repo = MemberRepository(db)
+            while not self._stopping:
+                batch = repo.expire_due(now, self.batch_size)
+                if not batch:
+                    break
+                expired.update(batch)
+        finally:
+            db.close()
+        for gym_id in expired:
+            member_index.invalidate(gym_id)
+            invalidate_dashboard(gym_id)
+        self.expired += sum(expired.values())
+        self._record_run(now)
+        return expired
+
+    def stats(self) -> dict:
+        return {**super().stats(), "expired": self.expired}
+
+expiry_sweeper = MembershipExpirySweeper(
+    interval_seconds=settings.MEMBERSHIP_SWEEP_INTERVAL_SECONDS,
+    batch_size=settings.MEMBERSHIP_SWEEP_BATCH_SIZE
+)
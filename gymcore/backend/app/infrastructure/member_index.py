@@ -0,0 +1,120 @@
+import threading
+import time
+from datetime import datetime
+from typing import Dict, NamedTuple, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.infrastructure.database import MemberModel
+
+class MemberEntry(NamedTuple):
+    member_id: int
+    full_name: str
+    dni: str
+    membership_status: str
+    end_date: datetime
+
+def _entry(member) -> MemberEntry:
+    return MemberEntry(member.id, member.full_name, member.dni, member.membership_status, member.end_date)
+
+class MemberDniIndex:
+    """Per-gym, process-local map of DNI -> check-in relevant member fields.
+
+    A gym's map is loaded with one query on first use and reloaded after
+    `ttl_seconds`, which bounds staleness from writes made by other worker
+    processes. Writes made in this process keep it in sync through
+    `upsert`/`remove`. Every scan, admitted or rejected, is answered from
+    the map; the map holds all of the gym's members, so a DNI it lacks is
+    unknown. With `recheck_rejections`, a missing DNI or an entry that would
+    turn the member away is re-read from the database instead, trading one
+    query per rejected scan for not waiting out the TTL on writes made in
+    another worker.
+    """
+
+    def __init__(self, ttl_seconds: float, recheck_rejections: bool = False):
+        self.ttl_seconds = ttl_seconds
+        self.recheck_rejections = recheck_rejections
+        self.hits = 0
+        self.misses = 0
+        self.rechecks = 0
+        self.loads = 0
+        self._gyms: Dict[int, Tuple[float, Dict[str, MemberEntry]]] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, db: Session, gym_id: int) -> Dict[str, MemberEntry]:
+        rows = db.query(
+            MemberModel.id,
+            MemberModel.full_name,
+            MemberModel.dni,
+            MemberModel.membership_status,
+            MemberModel.end_date
+        ).filter(MemberModel.gym_id == gym_id).all()
+        entries = {row.dni: _entry(row) for row in rows}
+        with self._lock:
+            self._gyms[gym_id] = (time.monotonic() + self.ttl_seconds, entries)
+            self.loads += 1
+        return entries
+
+    def _entries(self, db: Session, gym_id: int) -> Dict[str, MemberEntry]:
+        cached = self._gyms.get(gym_id)
+        if cached is None or cached[0] <= time.monotonic():
+            return self._load(db, gym_id)
+        return cached[1]
+
+    def lookup(self, db: Session, gym_id: int, dni: str) -> Optional[MemberEntry]:
+        entry = self._entries(db, gym_id).get(dni)
+        admits = entry is not None and entry.membership_status == 'active' and entry.end_date >= datetime.now()
+        if admits or not self.recheck_rejections:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+        self.rechecks += 1
+        member = db.query(MemberModel).filter(
+            MemberModel.dni == dni,
+            MemberModel.gym_id == gym_id
+        ).first()
+        if member is None:
+            if entry is not None:
+                self.remove(gym_id, dni)
+            return None
+        self.upsert(member)
+        return _entry(member)
+
+    def upsert(self, member: MemberModel, previous_dni: Optional[str] = None) -> None:
+        with self._lock:
+            cached = self._gyms.get(member.gym_id)
+            if cached is None:
+                return
+            entries = cached[1]
+            if previous_dni and previous_dni != member.dni:
+                entries.pop(previous_dni, None)
+            entries[member.dni] = _entry(member)
+
+    def remove(self, gym_id: int, dni: str) -> None:
+        with self._lock:
+            cached = self._gyms.get(gym_id)
+            if cached is not None:
+                cached[1].pop(dni, None)
+
+    def invalidate(self, gym_id: int) -> None:
+        with self._lock:
+            self._gyms.pop(gym_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            gyms = len(self._gyms)
+            members = sum(len(entries) for _, entries in self._gyms.values())
+        return {
+            "gyms": gyms,
+            "members": members,
+            "hits": self.hits,
+            "misses": self.misses,
+            "rechecks": self.rechecks,
+            "loads": self.loads
+        }
+
+member_index = MemberDniIndex(
+    ttl_seconds=settings.MEMBER_INDEX_TTL_SECONDS,
+    recheck_rejections=settings.MEMBER_INDEX_RECHECK_REJECTIONS
+)
@@ -0,0 +1,137 @@
+"""
+Migraciones versionadas del esquema.
+
+Se aplican de forma explícita con `python manage.py migrate`, nunca al
+importar la app. Cada migración debe ser idempotente: la migración base crea
+las tablas que falten según los modelos actuales, y las siguientes deben
+tolerar que su cambio ya exista en una base recién creada.
+"""
+from datetime import datetime
+from typing import Callable, List, Tuple
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from app.infrastructure.database import Base, MemberModel, NotificationModel, AttendanceHourlyModel, MembershipPlanModel, RevenueLedgerModel, GymCounterModel, PlatformMetricsModel, ResourceVersionModel
+from app.infrastructure.search import create_search_index
+from app.infrastructure.repositories import AttendanceRepository, RevenueLedgerRepository, GymCounterRepository, PlatformMetricsRepository
+
+_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String(100)),
+    Column("applied_at", DateTime, default=datetime.utcnow),
+)
+
+def _baseline(conn: Connection) -> None:
+    Base.metadata.create_all(bind=conn)
+
+# Frozen: the indexes this migration introduced, not whatever the models
+# declare later (later indexes come with their own migrations)
+COMPOSITE_INDEXES = [
+    ("ix_members_gym_status", "members", ("gym_id", "membership_status")),
+    ("ix_members_gym_dni", "members", ("gym_id", "dni")),
+    ("ix_members_gym_created_at", "members", ("gym_id", "created_at")),
+    ("ix_attendances_gym_check_in_time", "attendances", ("gym_id", "check_in_time")),
+    ("ix_notifications_gym_is_read_created_at", "notifications", ("gym_id", "is_read", "created_at")),
+    ("ix_subscriptions_gym_status", "subscriptions", ("gym_id", "status")),
+]
+
+def _composite_indexes(conn: Connection) -> None:
+    for name, table, columns in COMPOSITE_INDEXES:
+        conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+
+def _attendance_hourly(conn: Connection) -> None:
+    AttendanceHourlyModel.__table__.create(bind=conn, checkfirst=True)
+    AttendanceRepository(Session(bind=conn)).rebuild_rollup()
+
+def _revenue_ledger(conn: Connection) -> None:
+    RevenueLedgerModel.__table__.create(bind=conn, checkfirst=True)
+    if conn.execute(select(RevenueLedgerModel.id).limit(1)).first():
+        return
+    # Backfill one 'new' entry per existing member, dated at its start_date
+    db = Session(bind=conn)
+    ledger = RevenueLedgerRepository(db)
+    members = db.query(MemberModel, MembershipPlanModel).outerjoin(
+        MembershipPlanModel, MemberModel.plan_id == MembershipPlanModel.id
+    ).filter(MemberModel.start_date.isnot(None)).yield_per(1000)
+    with db.no_autoflush:
+        for count, (member, plan) in enumerate(members, start=1):
+            ledger.record(member, plan, 'new', occurred_at=member.start_date)
+            if count % 1000 == 0:
+                db.flush()
+    db.flush()
+
+def _gym_counters(conn: Connection) -> None:
+    GymCounterModel.__table__.create(bind=conn, checkfirst=True)
+    GymCounterRepository(Session(bind=conn)).rebuild()
+
+def _platform_metrics(conn: Connection) -> None:
+    PlatformMetricsModel.__table__.create(bind=conn, checkfirst=True)
+    PlatformMetricsRepository(Session(bind=conn)).recompute()
+
+def _search_index(conn: Connection) -> None:
+    # Solo SQLite con FTS5; en otros motores la búsqueda usa ILIKE
+    create_search_index(conn)
+
+def _member_index(name: str) -> Callable[[Connection], None]:
+    def migrate(conn: Connection) -> None:
+        for index in MemberModel.__table__.indexes:
+            if index.name == name:
+                index.create(bind=conn, checkfirst=True)
+    return migrate
+
+def _notification_dedupe_key(conn: Connection) -> None:
+    columns = {column["name"] for column in inspect(conn).get_columns(NotificationModel.__tablename__)}
+    if "dedupe_key" not in columns:
+        conn.exec_driver_sql("ALTER TABLE notifications ADD COLUMN dedupe_key VARCHAR(100)")
+    # Literal DDL so the index always lands after the column it depends on
+    conn.exec_driver_sql(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_notifications_gym_dedupe_key ON notifications (gym_id, dedupe_key)"
+    )
+
+def _resource_versions(conn: Connection) -> None:
+    # No backfill: a missing row reads as version 0
+    ResourceVersionModel.__table__.create(bind=conn, checkfirst=True)
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "baseline", _baseline),
+    (2, "composite_indexes", _composite_indexes),
+    (3, "attendance_hourly", _attendance_hourly),
+    (4, "revenue_ledger", _revenue_ledger),
+    (5, "gym_counters", _gym_counters),
+    (6, "platform_metrics", _platform_metrics),
+    (7, "search_index", _search_index),
+    (8, "member_name_index", _member_index("ix_members_gym_full_name")),
+    (9, "member_expiry_index", _member_index("ix_members_status_end_date")),
+    (10, "notification_dedupe_key", _notification_dedupe_key),
+    (11, "resource_versions", _resource_versions),
+]
+
+def applied_versions(engine: Engine) -> set:
+    with engine.connect() as conn:
+        if not inspect(conn).has_table(schema_migrations.name):
+            return set()
+        return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+def pending_migrations(engine: Engine) -> List[Tuple[int, str, Callable[[Connection], None]]]:
+    applied = applied_versions(engine)
+    return [migration for migration in MIGRATIONS if migration[0] not in applied]
+
+def run_migrations(engine: Engine) -> List[str]:
+    """Apply pending migrations in order, each in its own transaction."""
+    with engine.begin() as conn:
+        _metadata.create_all(bind=conn)
+    applied = []
+    for version, name, migrate in pending_migrations(engine):
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=version,
+                name=name,
+                applied_at=datetime.utcnow()
+            ))
+        applied.append(f"{version:04d}_{name}")
+    return applied
@@ -0,0 +1,22 @@
+from typing import List
+from sqlalchemy.orm import Session
+from app.infrastructure.event_hub import EventHub
+from app.infrastructure.repositories import NotificationRepository
+
+notification_hub = EventHub()
+
+def publish_notifications(db: Session, rows: List[dict]) -> None:
+    """Push committed notifications and the new unread totals to connected clients."""
+    rows = [row for row in rows if notification_hub.has_subscribers(row["gym_id"])]
+    if not rows:
+        return
+    unread = NotificationRepository(db).unread_counts([row["gym_id"] for row in rows])
+    for row in rows:
+        notification_hub.publish(row["gym_id"], "notification", {k: v for k, v in row.items() if k != "gym_id"})
+    for gym_id, count in unread.items():
+        notification_hub.publish(gym_id, "unread_count", {"unread_count": count})
+
+def publish_unread_count(db: Session, gym_id: int) -> None:
+    if notification_hub.has_subscribers(gym_id):
+        count = NotificationRepository(db).unread_counts([gym_id])[gym_id]
+        notification_hub.publish(gym_id, "unread_count", {"unread_count": count})
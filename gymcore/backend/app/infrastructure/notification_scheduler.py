@@ -0,0 +1,51 @@
+from datetime import datetime
+from app.core.config import settings
+from app.infrastructure.database import SessionLocal
+from app.infrastructure.repositories import NotificationRepository
+from app.infrastructure.scheduler import PeriodicJob
+from app.infrastructure.notification_hub import publish_notifications
+
+class NotificationScheduler(PeriodicJob):
+    """Background job that generates condition-based notifications for all gyms.
+
+    Each condition is one INSERT ... SELECT across every tenant; dedupe keys
+    make repeated runs (or runs from several processes) insert nothing new.
+    """
+
+    thread_name = "notification-scheduler"
+
+    def __init__(self, interval_seconds: int):
+        super().__init__(interval_seconds)
+        self.generated = 0
+
+    def run_once(self) -> dict:
+        return self.generate()
+
+    def generate(self) -> dict:
+        """Run every generator now in one transaction. Returns new notifications per condition."""
+        now = datetime.now()
+        db = SessionLocal()
+        try:
+            repo = NotificationRepository(db)
+            created = {
+                "members_expiring": repo.generate_expiring_members(now),
+                "subscription_renewal": repo.generate_subscription_renewals(now)
+            }
+            db.commit()
+            publish_notifications(db, [row for rows in created.values() for row in rows])
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        counts = {condition: len(rows) for condition, rows in created.items()}
+        self.generated += sum(counts.values())
+        self._record_run(now)
+        return counts
+
+    def stats(self) -> dict:
+        return {**super().stats(), "generated": self.generated}
+
+notification_scheduler = NotificationScheduler(
+    interval_seconds=settings.NOTIFICATION_SCHEDULE_INTERVAL_SECONDS
+)
@@ -1,8 +1,15 @@
+from sqlalchemy import insert, select, delete, update, func, case, extract, and_, or_, exists, literal, cast, String, Boolean, DateTime
 from sqlalchemy.orm import Session, joinedload
-from typing import List, Optional
-from app.infrastructure.database import GymModel, UserModel, MemberModel, SubscriptionModel, MembershipPlanModel, AttendanceModel
+from typing import List, Optional, Tuple
+from collections import Counter
+from datetime import datetime, timedelta
+from app.infrastructure.database import GymModel, UserModel, MemberModel, SubscriptionModel, MembershipPlanModel, AttendanceModel, GymAuthEpochModel, AttendanceHourlyModel, RevenueLedgerModel, GymCounterModel, PlatformMetricsModel, NotificationModel, ResourceVersionModel
 from app.domain.entities import Gym, User, Member, Subscription, MembershipPlan
-from app.core.security import verify_password, get_password_hash
+from app.core.security import verify_password
+from app.infrastructure.cache import invalidate_gym, invalidate_dashboard
+
+# Prices for members created before custom plans existed (membership_type only)
+LEGACY_MEMBERSHIP_PRICES = {"basic": 99.0, "pro": 269.0, "elite": 499.0}
 
 class GymRepository:
     def __init__(self, db: Session):
@@ -18,6 +25,9 @@ class GymRepository:
             is_active=gym.is_active
         )
         self.db.add(db_gym)
+        self.db.flush()
+        self.db.add(GymCounterModel(gym_id=db_gym.id))
+        PlatformMetricsRepository(self.db).record_new_gym(bool(db_gym.is_active))
         self.db.commit()
         self.db.refresh(db_gym)
         return db_gym
@@ -31,8 +41,13 @@ class GymRepository:
     def update_status(self, gym_id: int, is_active: bool) -> Optional[GymModel]:
         gym = self.get_by_id(gym_id)
         if gym:
+            if gym.is_active != is_active:
+                AuthEpochRepository(self.db).bump(gym_id)
+                PlatformMetricsRepository(self.db).apply_delta(active_gyms=1 if is_active else -1)
+                ResourceVersionRepository(self.db).bump(gym_id, ResourceVersionRepository.GYM_PROFILE)
             gym.is_active = is_active
             self.db.commit()
+            invalidate_gym(gym_id)
             self.db.refresh(gym)
         return gym
 
@@ -40,24 +55,231 @@ class GymRepository:
         gym = self.get_by_id(gym_id)
         if gym:
             gym.plan_type = plan_type
+            ResourceVersionRepository(self.db).bump(gym_id, ResourceVersionRepository.GYM_PROFILE)
             self.db.commit()
+            invalidate_gym(gym_id)
             self.db.refresh(gym)
         return gym
 
+class AuthEpochRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, gym_id: int) -> int:
+        epoch = self.db.query(GymAuthEpochModel.epoch).filter(GymAuthEpochModel.gym_id == gym_id).scalar()
+        return epoch or 0
+
+    def bump(self, gym_id: int) -> None:
+        """Invalidate token claims issued for this gym. The caller commits."""
+        updated = self.db.query(GymAuthEpochModel).filter(
+            GymAuthEpochModel.gym_id == gym_id
+        ).update({GymAuthEpochModel.epoch: GymAuthEpochModel.epoch + 1}, synchronize_session=False)
+        if not updated:
+            self.db.add(GymAuthEpochModel(gym_id=gym_id, epoch=1))
+
+class ResourceVersionRepository:
+    """Per-gym versions of slow-changing resources, used as ETags.
+
+    Writes to a resource `bump` it inside their own transaction (the caller
+    commits), so a version never moves ahead of the data it describes.
+    """
+
+    MEMBERSHIP_PLANS = "membership_plans"
+    GYM_PROFILE = "gym_profile"
+    INVOICES = "invoices"
+    DASHBOARD = "dashboard"
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, gym_id: int, resource: str) -> int:
+        version = self.db.query(ResourceVersionModel.version).filter(
+            ResourceVersionModel.gym_id == gym_id,
+            ResourceVersionModel.resource == resource
+        ).scalar()
+        return version or 0
+
+    def bump(self, gym_id: int, *resources: str) -> None:
+        dialect = self.db.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert as upsert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as upsert
+            stmt = upsert(ResourceVersionModel).values([
+                {"gym_id": gym_id, "resource": resource, "version": 1, "updated_at": datetime.utcnow()}
+                for resource in resources
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[ResourceVersionModel.gym_id, ResourceVersionModel.resource],
+                set_={"version": ResourceVersionModel.version + 1, "updated_at": stmt.excluded.updated_at}
+            )
+            self.db.execute(stmt)
+            return
+        for resource in resources:
+            updated = self.db.query(ResourceVersionModel).filter(
+                ResourceVersionModel.gym_id == gym_id,
+                ResourceVersionModel.resource == resource
+            ).update({ResourceVersionModel.version: ResourceVersionModel.version + 1}, synchronize_session=False)
+            if not updated:
+                self.db.add(ResourceVersionModel(gym_id=gym_id, resource=resource, version=1))
+
+class GymCounterRepository:
+    """Maintains gym_counters. Every method joins the caller's transaction; the caller commits."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def apply_member_delta(self, gym_id: int, members: int = 0, active_members: int = 0) -> None:
+        if not members and not active_members:
+            return
+        PlatformMetricsRepository(self.db).apply_delta(total_members=members, active_members=active_members)
+        updated = self.db.query(GymCounterModel).filter(GymCounterModel.gym_id == gym_id).update({
+            GymCounterModel.members: GymCounterModel.members + members,
+            GymCounterModel.active_members: GymCounterModel.active_members + active_members
+        }, synchronize_session=False)
+        if not updated:
+            self.rebuild(gym_id)
+
+    def add_attendances(self, rows: List[dict]) -> None:
+        today = datetime.now().date()
+        per_gym = Counter(row["gym_id"] for row in rows if row["check_in_time"].date() == today)
+        for gym_id, count in per_gym.items():
+            updated = self.db.query(GymCounterModel).filter(GymCounterModel.gym_id == gym_id).update({
+                GymCounterModel.attendances_today: case(
+                    (GymCounterModel.attendances_date == today, GymCounterModel.attendances_today + count),
+                    else_=count
+                ),
+                GymCounterModel.attendances_date: today
+            }, synchronize_session=False)
+            if not updated:
+                self.rebuild(gym_id)
+
+    def rebuild(self, gym_id: Optional[int] = None) -> None:
+        """Recompute counters from members and the attendance rollup.
+
+        Flushes first: the session does not autoflush, and the counts must
+        include member writes still pending in the caller's transaction.
+        """
+        self.db.flush()
+        today = datetime.now().date()
+        members = self.db.query(
+            MemberModel.gym_id,
+            func.count(MemberModel.id),
+            func.sum(case((MemberModel.membership_status == 'active', 1), else_=0))
+        ).group_by(MemberModel.gym_id)
+        attendances = self.db.query(
+            AttendanceHourlyModel.gym_id,
+            func.sum(AttendanceHourlyModel.check_ins)
+        ).filter(AttendanceHourlyModel.date == today).group_by(AttendanceHourlyModel.gym_id)
+        gyms = self.db.query(GymModel.id)
+        clear = delete(GymCounterModel)
+        if gym_id is not None:
+            members = members.filter(MemberModel.gym_id == gym_id)
+            attendances = attendances.filter(AttendanceHourlyModel.gym_id == gym_id)
+            gyms = gyms.filter(GymModel.id == gym_id)
+            clear = clear.where(GymCounterModel.gym_id == gym_id)
+
+        member_counts = {row[0]: row[1:] for row in members.all()}
+        attendance_counts = dict(attendances.all())
+        self.db.execute(clear)
+        rows = []
+        for (gid,) in gyms.all():
+            total, active = member_counts.get(gid, (0, 0))
+            rows.append({
+                "gym_id": gid,
+                "members": total,
+                "active_members": active or 0,
+                "attendances_today": attendance_counts.get(gid, 0) or 0,
+                "attendances_date": today
+            })
+        if rows:
+            self.db.execute(insert(GymCounterModel), rows)
+
+class PlatformMetricsRepository:
+    """Maintains the single platform_metrics row. Writes join the caller's transaction; the caller commits."""
+
+    ROW_ID = 1
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def current_period() -> str:
+        return RevenueLedgerRepository.period_of(datetime.now())
+
+    def _update(self, values: dict) -> None:
+        updated = self.db.query(PlatformMetricsModel).filter(
+            PlatformMetricsModel.id == self.ROW_ID
+        ).update(values, synchronize_session=False)
+        if not updated:
+            self.recompute()
+
+    def apply_delta(self, **deltas) -> None:
+        values = {
+            getattr(PlatformMetricsModel, column): getattr(PlatformMetricsModel, column) + delta
+            for column, delta in deltas.items() if delta
+        }
+        if values:
+            self._update(values)
+
+    def record_new_gym(self, is_active: bool) -> None:
+        period = self.current_period()
+        self._update({
+            PlatformMetricsModel.total_gyms: PlatformMetricsModel.total_gyms + 1,
+            PlatformMetricsModel.active_gyms: PlatformMetricsModel.active_gyms + int(is_active),
+            PlatformMetricsModel.new_gyms_this_month: case(
+                (PlatformMetricsModel.new_gyms_period == period, PlatformMetricsModel.new_gyms_this_month + 1),
+                else_=1
+            ),
+            PlatformMetricsModel.new_gyms_period: period
+        })
+
+    def get(self) -> Optional[PlatformMetricsModel]:
+        return self.db.query(PlatformMetricsModel).filter(PlatformMetricsModel.id == self.ROW_ID).first()
+
+    def recompute(self) -> PlatformMetricsModel:
+        """Recount every metric from gyms, members and subscriptions."""
+        self.db.flush()
+        now = datetime.now()
+        start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        total_gyms, active_gyms, new_gyms = self.db.query(
+            func.count(GymModel.id),
+            func.sum(case((GymModel.is_active == True, 1), else_=0)),
+            func.sum(case((GymModel.created_at >= start_of_month, 1), else_=0))
+        ).one()
+        total_members, active_members = self.db.query(
+            func.count(MemberModel.id),
+            func.sum(case((MemberModel.membership_status == 'active', 1), else_=0))
+        ).one()
+        active_revenue = self.db.query(func.sum(SubscriptionModel.amount)).filter(
+            SubscriptionModel.status == 'active'
+        ).scalar()
+
+        metrics = self.get()
+        if metrics is None:
+            metrics = PlatformMetricsModel(id=self.ROW_ID)
+            self.db.add(metrics)
+        else:
+            # The row may have been changed by bulk UPDATEs since it was loaded
+            self.db.refresh(metrics)
+        metrics.total_gyms = total_gyms
+        metrics.active_gyms = active_gyms or 0
+        metrics.total_members = total_members
+        metrics.active_members = active_members or 0
+        metrics.new_gyms_this_month = new_gyms or 0
+        metrics.new_gyms_period = self.current_period()
+        metrics.active_revenue = float(active_revenue or 0)
+        metrics.reconciled_at = now
+        self.db.flush()
+        return metrics
+
 class UserRepository:
     def __init__(self, db: Session):
         self.db = db
 
     def create(self, user: User) -> UserModel:
-        hashed_password = get_password_hash(user.hashed_password) # Assuming input is plain text here or handled before. 
-        # The entity User has 'hashed_password' field. 
-        # If the use case passes plain text in that field, we hash it here.
-        # Or if the use case hashes it, we just use it.
-        # Let's assume the use case handles hashing or we hash here if it looks like plain text?
-        # Better: The UseCase should probably hash it, OR we hash it here.
-        # Given 'hashed_password' field name in Entity, let's assume it comes hashed or we treat the input as the value to store.
-        # However, for safety, let's assume the UseCase passes the HASHED password in the entity field 'hashed_password'.
-        
+        # user.hashed_password already holds the bcrypt hash
         db_user = UserModel(
             gym_id=user.gym_id,
             email=user.email,
@@ -131,6 +353,160 @@ class MemberRepository:
     def count_by_gym(self, gym_id: int) -> int:
         return self.db.query(MemberModel).filter(MemberModel.gym_id == gym_id).count()
 
+    def count_by_status(self, gym_id: int) -> dict:
+        """{status: count} for the gym plus an 'all' total, from one grouped query."""
+        rows = self.db.query(
+            MemberModel.membership_status,
+            func.count(MemberModel.id)
+        ).filter(MemberModel.gym_id == gym_id).group_by(MemberModel.membership_status).all()
+        totals = {status: count for status, count in rows if status is not None}
+        totals["all"] = sum(count for _, count in rows)
+        return totals
+
+    def get_dashboard_stats(self, gym_id: int) -> dict:
+        """Member counts, plan distribution and plan revenue in a single grouped query."""
+        start_of_month = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        rows = self.db.query(
+            MembershipPlanModel.name,
+            MembershipPlanModel.price,
+            func.count(MemberModel.id),
+            func.sum(case((MemberModel.membership_status == 'active', 1), else_=0)),
+            func.sum(case((MemberModel.membership_status == 'inactive', 1), else_=0)),
+            func.sum(case((MemberModel.created_at >= start_of_month, 1), else_=0))
+        ).outerjoin(
+            MembershipPlanModel, MemberModel.plan_id == MembershipPlanModel.id
+        ).filter(
+            MemberModel.gym_id == gym_id
+        ).group_by(MembershipPlanModel.id, MembershipPlanModel.name, MembershipPlanModel.price).all()
+
+        stats = {
+            "total_members": 0,
+            "active_members": 0,
+            "inactive_members": 0,
+            "revenue_this_month": 0,
+            "new_members_this_month": 0,
+            "membership_distribution": {}
+        }
+        distribution = stats["membership_distribution"]
+        for name, price, total, active, inactive, new in rows:
+            stats["total_members"] += total
+            stats["active_members"] += active or 0
+            stats["inactive_members"] += inactive or 0
+            stats["new_members_this_month"] += new or 0
+            if name is not None:
+                distribution[name] = distribution.get(name, 0) + total
+                stats["revenue_this_month"] += total * (price or 0)
+        return stats
+
+    def iter_export(self, gym_id: int, status: Optional[str] = None, batch_size: int = 1000):
+        """Yield plain row tuples for export, fetching `batch_size` at a time (server-side cursor where supported)."""
+        stmt = select(
+            MemberModel.id,
+            MemberModel.full_name,
+            MemberModel.dni,
+            MemberModel.email,
+            MemberModel.phone,
+            MemberModel.membership_status,
+            MembershipPlanModel.name,
+            MemberModel.membership_type,
+            MemberModel.start_date,
+            MemberModel.end_date,
+            MemberModel.created_at
+        ).outerjoin(
+            MembershipPlanModel, MemberModel.plan_id == MembershipPlanModel.id
+        ).where(MemberModel.gym_id == gym_id)
+        if status:
+            stmt = stmt.where(MemberModel.membership_status == status)
+        result = self.db.execute(stmt.order_by(MemberModel.id).execution_options(yield_per=batch_size))
+        for row in result:
+            yield tuple(row)
+
+    def expire_due(self, now: datetime, batch_size: int = 1000) -> Counter:
+        """Mark up to `batch_size` active members whose end_date has passed as 'expired'.
+
+        One UPDATE driven by ix_members_status_end_date; counters are adjusted
+        in the same commit. Returns expired members per gym (empty when done).
+        """
+        due = select(MemberModel.id).where(
+            MemberModel.membership_status == 'active',
+            MemberModel.end_date < now
+        ).limit(batch_size)
+        gym_ids = self.db.execute(
+            update(MemberModel).where(
+                MemberModel.id.in_(due.scalar_subquery()),
+                MemberModel.membership_status == 'active'
+            ).values(membership_status='expired', updated_at=now).returning(MemberModel.gym_id),
+            execution_options={"synchronize_session": False}
+        ).scalars().all()
+        expired = Counter(gym_ids)
+        counters = GymCounterRepository(self.db)
+        versions = ResourceVersionRepository(self.db)
+        for gym_id, count in expired.items():
+            counters.apply_member_delta(gym_id, active_members=-count)
+            versions.bump(gym_id, ResourceVersionRepository.DASHBOARD)
+        self.db.commit()
+        return expired
+
+    def existing_dnis(self, dnis: List[str]) -> set:
+        """DNIs among `dnis` already taken by any gym (DNIs are unique platform-wide)."""
+        if not dnis:
+            return set()
+        return set(self.db.execute(
+            select(MemberModel.dni).where(MemberModel.dni.in_(set(dnis)))
+        ).scalars())
+
+    def bulk_create(self, gym_id: int, rows: List[dict], plans: dict) -> List[int]:
+        """Insert many active members in one transaction and return their ids in input order.
+
+        Each row needs the member columns except gym_id and membership_status;
+        `plans` maps plan_id to its MembershipPlanModel for the revenue ledger.
+        A 'new' ledger entry is written per member and the gym counters are
+        updated, all inside the same commit.
+        """
+        if not rows:
+            return []
+        values = [{**row, "gym_id": gym_id, "membership_status": 'active'} for row in rows]
+        ids = self.db.execute(
+            insert(MemberModel).returning(MemberModel.id, sort_by_parameter_order=True),
+            values
+        ).scalars().all()
+        entries = []
+        for member_id, row in zip(ids, rows):
+            plan = plans.get(row.get("plan_id"))
+            entries.append({
+                "gym_id": gym_id,
+                "member_id": member_id,
+                "plan_id": row.get("plan_id"),
+                "kind": 'new',
+                "amount": (plan.price or 0.0) if plan is not None else LEGACY_MEMBERSHIP_PRICES.get(row.get("membership_type"), 0.0),
+                "period": RevenueLedgerRepository.period_of(row["start_date"]),
+                "occurred_at": row["start_date"]
+            })
+        self.db.execute(insert(RevenueLedgerModel), entries)
+        GymCounterRepository(self.db).apply_member_delta(gym_id, members=len(ids), active_members=len(ids))
+        ResourceVersionRepository(self.db).bump(gym_id, ResourceVersionRepository.DASHBOARD)
+        self.db.commit()
+        return ids
+
+    def get_by_dnis(self, gym_id: int, dnis: List[str], chunk_size: int = 500) -> dict:
+        """Resolve many DNIs at once. Returns {dni: row} with id, full_name, status, start_date and end_date."""
+        unique_dnis = list(set(dnis))
+        found = {}
+        for start in range(0, len(unique_dnis), chunk_size):
+            rows = self.db.query(
+                MemberModel.id,
+                MemberModel.full_name,
+                MemberModel.dni,
+                MemberModel.membership_status,
+                MemberModel.start_date,
+                MemberModel.end_date
+            ).filter(
+                MemberModel.gym_id == gym_id,
+                MemberModel.dni.in_(unique_dnis[start:start + chunk_size])
+            ).all()
+            found.update({row.dni: row for row in rows})
+        return found
+
 class SubscriptionRepository:
     def __init__(self, db: Session):
         self.db = db
@@ -145,6 +521,9 @@ class SubscriptionRepository:
             end_date=subscription.end_date
         )
         self.db.add(db_sub)
+        if db_sub.status == 'active':
+            PlatformMetricsRepository(self.db).apply_delta(active_revenue=db_sub.amount or 0)
+        ResourceVersionRepository(self.db).bump(subscription.gym_id, ResourceVersionRepository.INVOICES)
         self.db.commit()
         self.db.refresh(db_sub)
         return db_sub
@@ -158,7 +537,12 @@ class SubscriptionRepository:
     def update_status(self, subscription_id: int, status: str) -> Optional[SubscriptionModel]:
         sub = self.db.query(SubscriptionModel).filter(SubscriptionModel.id == subscription_id).first()
         if sub:
+            was_active, is_active = sub.status == 'active', status == 'active'
+            if was_active != is_active:
+                amount = sub.amount or 0
+                PlatformMetricsRepository(self.db).apply_delta(active_revenue=amount if is_active else -amount)
             sub.status = status
+            ResourceVersionRepository(self.db).bump(sub.gym_id, ResourceVersionRepository.INVOICES)
             self.db.commit()
             self.db.refresh(sub)
         return sub
@@ -168,6 +552,18 @@ class SubscriptionRepository:
             SubscriptionModel.gym_id == gym_id
         ).order_by(SubscriptionModel.start_date.desc()).all()
 
+    def get_invoice_rows(self, gym_id: int) -> list:
+        """(id, start_date, amount, plan_type, status) of every subscription, newest first."""
+        return self.db.execute(
+            select(
+                SubscriptionModel.id,
+                SubscriptionModel.start_date,
+                SubscriptionModel.amount,
+                SubscriptionModel.plan_type,
+                SubscriptionModel.status
+            ).where(SubscriptionModel.gym_id == gym_id).order_by(SubscriptionModel.start_date.desc())
+        ).all()
+
 class MembershipPlanRepository:
     def __init__(self, db: Session):
         self.db = db
@@ -183,7 +579,9 @@ class MembershipPlanRepository:
             is_active=plan.is_active
         )
         self.db.add(db_plan)
+        ResourceVersionRepository(self.db).bump(plan.gym_id, ResourceVersionRepository.MEMBERSHIP_PLANS, ResourceVersionRepository.DASHBOARD)
         self.db.commit()
+        invalidate_dashboard(plan.gym_id)
         self.db.refresh(db_plan)
         return db_plan
 
@@ -193,6 +591,20 @@ class MembershipPlanRepository:
             MembershipPlanModel.gym_id == gym_id
         ).first()
 
+    def resolve(self, gym_id: int, ids: List[int], names: List[str]) -> List[MembershipPlanModel]:
+        """The gym's plans matching any of `ids` or `names`, in one query."""
+        conditions = []
+        if ids:
+            conditions.append(MembershipPlanModel.id.in_(set(ids)))
+        if names:
+            conditions.append(MembershipPlanModel.name.in_(set(names)))
+        if not conditions:
+            return []
+        return self.db.query(MembershipPlanModel).filter(
+            MembershipPlanModel.gym_id == gym_id,
+            or_(*conditions)
+        ).all()
+
     def get_all_by_gym(self, gym_id: int, include_inactive: bool = False) -> List[MembershipPlanModel]:
         query = self.db.query(MembershipPlanModel).filter(MembershipPlanModel.gym_id == gym_id)
         if not include_inactive:
@@ -204,7 +616,9 @@ class MembershipPlanRepository:
         if plan:
             for key, value in plan_data.items():
                 setattr(plan, key, value)
+            ResourceVersionRepository(self.db).bump(gym_id, ResourceVersionRepository.MEMBERSHIP_PLANS, ResourceVersionRepository.DASHBOARD)
             self.db.commit()
+            invalidate_dashboard(gym_id)
             self.db.refresh(plan)
         return plan
 
@@ -212,7 +626,9 @@ class MembershipPlanRepository:
         plan = self.get_by_id(plan_id, gym_id)
         if plan:
             self.db.delete(plan)
+            ResourceVersionRepository(self.db).bump(gym_id, ResourceVersionRepository.MEMBERSHIP_PLANS, ResourceVersionRepository.DASHBOARD)
             self.db.commit()
+            invalidate_dashboard(gym_id)
             return True
         return False
 
@@ -220,7 +636,9 @@ class MembershipPlanRepository:
         plan = self.get_by_id(plan_id, gym_id)
         if plan:
             plan.is_active = not plan.is_active
+            ResourceVersionRepository(self.db).bump(gym_id, ResourceVersionRepository.MEMBERSHIP_PLANS, ResourceVersionRepository.DASHBOARD)
             self.db.commit()
+            invalidate_dashboard(gym_id)
             self.db.refresh(plan)
         return plan
 
@@ -229,15 +647,91 @@ class AttendanceRepository:
         self.db = db
 
     def check_in(self, member_id: int, gym_id: int) -> AttendanceModel:
+        now = datetime.now()
         attendance = AttendanceModel(
             member_id=member_id,
-            gym_id=gym_id
+            gym_id=gym_id,
+            check_in_time=now,
+            created_at=now
         )
         self.db.add(attendance)
+        self._increment_rollup([{"gym_id": gym_id, "check_in_time": now}])
+        GymCounterRepository(self.db).add_attendances([{"gym_id": gym_id, "check_in_time": now}])
         self.db.commit()
         self.db.refresh(attendance)
         return attendance
 
+    def bulk_check_in(self, rows: List[dict]) -> List[int]:
+        """Insert many check-ins in one transaction and return their ids in input order.
+
+        Each row needs member_id, gym_id and check_in_time.
+        """
+        if not rows:
+            return []
+        values = [{**row, "created_at": row.get("created_at", row["check_in_time"])} for row in rows]
+        ids = self.db.execute(
+            insert(AttendanceModel).returning(AttendanceModel.id, sort_by_parameter_order=True),
+            values
+        ).scalars().all()
+        self._increment_rollup(values)
+        GymCounterRepository(self.db).add_attendances(values)
+        self.db.commit()
+        return ids
+
+    def _increment_rollup(self, rows: List[dict]) -> None:
+        """Add check-ins to their (gym, date, hour) buckets. The caller commits."""
+        buckets = Counter(
+            (row["gym_id"], row["check_in_time"].date(), row["check_in_time"].hour) for row in rows
+        )
+        dialect = self.db.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert as upsert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as upsert
+            stmt = upsert(AttendanceHourlyModel).values([
+                {"gym_id": gym_id, "date": day, "hour": hour, "check_ins": count}
+                for (gym_id, day, hour), count in buckets.items()
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[AttendanceHourlyModel.gym_id, AttendanceHourlyModel.date, AttendanceHourlyModel.hour],
+                set_={"check_ins": AttendanceHourlyModel.check_ins + stmt.excluded.check_ins}
+            )
+            self.db.execute(stmt)
+            return
+        for (gym_id, day, hour), count in buckets.items():
+            updated = self.db.execute(
+                update(AttendanceHourlyModel).where(
+                    AttendanceHourlyModel.gym_id == gym_id,
+                    AttendanceHourlyModel.date == day,
+                    AttendanceHourlyModel.hour == hour
+                ).values(check_ins=AttendanceHourlyModel.check_ins + count)
+            ).rowcount
+            if not updated:
+                self.db.add(AttendanceHourlyModel(gym_id=gym_id, date=day, hour=hour, check_ins=count))
+
+    def rebuild_rollup(self, gym_id: Optional[int] = None) -> None:
+        """Recompute attendance_hourly from raw attendances (backfills, repairs). The caller commits."""
+        clear = delete(AttendanceHourlyModel)
+        source = select(
+            AttendanceModel.gym_id,
+            func.date(AttendanceModel.check_in_time),
+            extract('hour', AttendanceModel.check_in_time),
+            func.count(AttendanceModel.id)
+        )
+        if gym_id is not None:
+            clear = clear.where(AttendanceHourlyModel.gym_id == gym_id)
+            source = source.where(AttendanceModel.gym_id == gym_id)
+        source = source.group_by(
+            AttendanceModel.gym_id,
+            func.date(AttendanceModel.check_in_time),
+            extract('hour', AttendanceModel.check_in_time)
+        )
+        self.db.execute(clear)
+        self.db.execute(insert(AttendanceHourlyModel).from_select(
+            ["gym_id", "date", "hour", "check_ins"], source
+        ))
+
     def get_by_member(self, member_id: int, limit: int = 10) -> List[AttendanceModel]:
         from sqlalchemy.orm import joinedload
         return self.db.query(AttendanceModel).options(
@@ -246,48 +740,266 @@ class AttendanceRepository:
             AttendanceModel.member_id == member_id
         ).order_by(AttendanceModel.check_in_time.desc()).limit(limit).all()
 
-    def get_today_by_gym(self, gym_id: int) -> List[AttendanceModel]:
-        from datetime import datetime, time
-        from sqlalchemy.orm import joinedload
+    def get_today_by_gym(self, gym_id: int, since_id: Optional[int] = None) -> list:
+        """Today's check-ins, newest first.
+
+        `since_id` is the highest attendance id the caller already has; only
+        rows inserted after it are returned. Ids grow with every insert, so
+        offline scans synced late with an earlier check_in_time are still
+        picked up; check_in_time only orders the result.
+        """
+        from datetime import time
         
         now = datetime.now()
         today_start = datetime.combine(now.date(), time.min)
         today_end = datetime.combine(now.date(), time.max)
         
-        return self.db.query(AttendanceModel).options(
-            joinedload(AttendanceModel.member)
-        ).filter(
-            AttendanceModel.gym_id == gym_id,
-            AttendanceModel.check_in_time >= today_start,
-            AttendanceModel.check_in_time <= today_end
-        ).order_by(AttendanceModel.check_in_time.desc()).all()
+        stmt = self._range_select(gym_id, today_start, today_end)
+        if since_id is not None:
+            stmt = stmt.where(AttendanceModel.id > since_id)
+        return self.db.execute(stmt).all()
+
+    def get_member_check_ins_since(self, gym_id: int, start: datetime) -> List[Tuple[datetime, int]]:
+        """(check_in_time, member_id) of every check-in from `start` on."""
+        return self.db.execute(
+            select(AttendanceModel.check_in_time, AttendanceModel.member_id).where(
+                AttendanceModel.gym_id == gym_id,
+                AttendanceModel.check_in_time >= start
+            )
+        ).all()
+
+    def _range_select(self, gym_id: int, start: Optional[datetime], end: Optional[datetime]):
+        stmt = select(
+            AttendanceModel.id,
+            AttendanceModel.member_id,
+            MemberModel.full_name,
+            MemberModel.dni,
+            AttendanceModel.check_in_time
+        ).join(
+            MemberModel, AttendanceModel.member_id == MemberModel.id
+        ).where(AttendanceModel.gym_id == gym_id)
+        if start is not None:
+            stmt = stmt.where(AttendanceModel.check_in_time >= start)
+        if end is not None:
+            stmt = stmt.where(AttendanceModel.check_in_time <= end)
+        return stmt.order_by(AttendanceModel.check_in_time.desc(), AttendanceModel.id.desc())
+
+    def get_range_page(self, gym_id: int, start: datetime, end: datetime, limit: int, after: Optional[tuple] = None) -> list:
+        """One keyset page, newest first. `after` is the (check_in_time, id) of the last row already served."""
+        stmt = self._range_select(gym_id, start, end)
+        if after:
+            after_time, after_id = after
+            stmt = stmt.where(or_(
+                AttendanceModel.check_in_time < after_time,
+                and_(AttendanceModel.check_in_time == after_time, AttendanceModel.id < after_id)
+            ))
+        return self.db.execute(stmt.limit(limit)).all()
+
+    def iter_range(self, gym_id: int, start: Optional[datetime], end: Optional[datetime], batch_size: int = 1000):
+        """Yield plain row tuples, fetching `batch_size` at a time (server-side cursor where supported).
+
+        A None bound leaves that side of the range open.
+        """
+        result = self.db.execute(self._range_select(gym_id, start, end).execution_options(yield_per=batch_size))
+        for row in result:
+            yield tuple(row)
 
     def get_stats(self, gym_id: int) -> dict:
-        from datetime import datetime, timedelta
-        from sqlalchemy import func
-        
         now = datetime.now()
         today_start = datetime(now.year, now.month, now.day, 0, 0, 0)
         week_start = now - timedelta(days=7)
         month_start = now - timedelta(days=30)
-        
-        today_count = self.db.query(func.count(AttendanceModel.id)).filter(
-            AttendanceModel.gym_id == gym_id,
-            AttendanceModel.check_in_time >= today_start
-        ).scalar()
-        
-        week_count = self.db.query(func.count(AttendanceModel.id)).filter(
-            AttendanceModel.gym_id == gym_id,
-            AttendanceModel.check_in_time >= week_start
-        ).scalar()
-        
-        month_count = self.db.query(func.count(AttendanceModel.id)).filter(
-            AttendanceModel.gym_id == gym_id,
-            AttendanceModel.check_in_time >= month_start
-        ).scalar()
-        
+
+        def since(moment: datetime):
+            # Hour-granular: the bucket that contains `moment` counts in full
+            return or_(
+                AttendanceHourlyModel.date > moment.date(),
+                and_(AttendanceHourlyModel.date == moment.date(), AttendanceHourlyModel.hour >= moment.hour)
+            )
+
+        def count_since(moment: datetime):
+            return func.sum(case((since(moment), AttendanceHourlyModel.check_ins), else_=0))
+
+        today_count, week_count, month_count = self.db.query(
+            count_since(today_start),
+            count_since(week_start),
+            count_since(month_start)
+        ).filter(
+            AttendanceHourlyModel.gym_id == gym_id,
+            AttendanceHourlyModel.date >= month_start.date()
+        ).one()
+
         return {
             "today_count": today_count or 0,
             "week_count": week_count or 0,
             "month_count": month_count or 0
         }
+
+    def get_timeseries(self, gym_id: int, days: int, granularity: str = "day") -> List[dict]:
+        start = (datetime.now() - timedelta(days=days - 1)).date()
+        columns = [AttendanceHourlyModel.date]
+        if granularity == "hour":
+            columns.append(AttendanceHourlyModel.hour)
+        rows = self.db.query(
+            *columns,
+            func.sum(AttendanceHourlyModel.check_ins)
+        ).filter(
+            AttendanceHourlyModel.gym_id == gym_id,
+            AttendanceHourlyModel.date >= start
+        ).group_by(*columns).order_by(*columns).all()
+
+        if granularity == "hour":
+            return [{"date": day, "hour": hour, "count": count} for day, hour, count in rows]
+        return [{"date": day, "hour": None, "count": count} for day, count in rows]
+
+class RevenueLedgerRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def period_of(moment: datetime) -> str:
+        return f"{moment.year:04d}-{moment.month:02d}"
+
+    @staticmethod
+    def amount_for(member: MemberModel, plan: Optional[MembershipPlanModel]) -> float:
+        if plan is not None:
+            return plan.price or 0.0
+        return LEGACY_MEMBERSHIP_PRICES.get(member.membership_type, 0.0)
+
+    def record(self, member: MemberModel, plan: Optional[MembershipPlanModel], kind: str, occurred_at: datetime) -> RevenueLedgerModel:
+        """Append a revenue entry for a member sign-up or renewal. The caller commits."""
+        entry = RevenueLedgerModel(
+            gym_id=member.gym_id,
+            member_id=member.id,
+            plan_id=plan.id if plan is not None else None,
+            kind=kind,
+            amount=self.amount_for(member, plan),
+            period=self.period_of(occurred_at),
+            occurred_at=occurred_at
+        )
+        self.db.add(entry)
+        return entry
+
+    def monthly_totals(self, gym_id: int, first_period: str, last_period: str) -> dict:
+        rows = self.db.query(
+            RevenueLedgerModel.period,
+            func.sum(RevenueLedgerModel.amount)
+        ).filter(
+            RevenueLedgerModel.gym_id == gym_id,
+            RevenueLedgerModel.period >= first_period,
+            RevenueLedgerModel.period <= last_period
+        ).group_by(RevenueLedgerModel.period).all()
+        return {period: total or 0.0 for period, total in rows}
+
+class NotificationRepository:
+    """Generates condition-based notifications for every gym with set-based INSERT ... SELECT.
+
+    Each generated row carries a dedupe_key (condition + period); the unique
+    (gym_id, dedupe_key) index plus a NOT EXISTS guard make every generator
+    idempotent, so they can run as often as wanted from any process.
+    """
+
+    COLUMNS = ["gym_id", "title", "message", "type", "is_read", "created_at", "dedupe_key"]
+    FIELDS = ["id", "gym_id", "title", "message", "type", "is_read", "created_at"]
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _insert_from_select(self, stmt) -> List[dict]:
+        """Run the INSERT ... SELECT and return the inserted rows (empty on dialects without RETURNING)."""
+        dialect = self.db.get_bind().dialect
+        if dialect.name in ("sqlite", "postgresql"):
+            if dialect.name == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert as upsert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as upsert
+            insert_stmt = upsert(NotificationModel).from_select(self.COLUMNS, stmt).on_conflict_do_nothing(
+                index_elements=[NotificationModel.gym_id, NotificationModel.dedupe_key]
+            )
+        else:
+            insert_stmt = insert(NotificationModel).from_select(self.COLUMNS, stmt)
+        if not dialect.insert_returning:
+            self.db.execute(insert_stmt)
+            return []
+        returning = [getattr(NotificationModel, field) for field in self.FIELDS]
+        return [dict(row._mapping) for row in self.db.execute(insert_stmt.returning(*returning))]
+
+    def snapshot(self, gym_id: int, unread_limit: int = 10, read_limit: int = 5) -> Tuple[List[dict], int]:
+        """Latest unread and read notifications plus the unread total, in one query."""
+        ranked = select(
+            *[getattr(NotificationModel, field) for field in self.FIELDS],
+            func.row_number().over(
+                partition_by=NotificationModel.is_read,
+                order_by=(NotificationModel.created_at.desc(), NotificationModel.id.desc())
+            ).label("position"),
+            func.sum(case((NotificationModel.is_read == False, 1), else_=0)).over().label("unread_total")
+        ).where(NotificationModel.gym_id == gym_id).subquery()
+        rows = self.db.execute(
+            select(ranked).where(or_(
+                and_(ranked.c.is_read == False, ranked.c.position <= unread_limit),
+                and_(ranked.c.is_read == True, ranked.c.position <= read_limit)
+            )).order_by(ranked.c.is_read, ranked.c.position)
+        ).all()
+        unread_total = rows[0].unread_total if rows else 0
+        return [{field: getattr(row, field) for field in self.FIELDS} for row in rows], unread_total or 0
+
+    def unread_counts(self, gym_ids: List[int]) -> dict:
+        if not gym_ids:
+            return {}
+        rows = self.db.query(
+            NotificationModel.gym_id,
+            func.count(NotificationModel.id)
+        ).filter(
+            NotificationModel.gym_id.in_(set(gym_ids)),
+            NotificationModel.is_read == False
+        ).group_by(NotificationModel.gym_id).all()
+        counts = {gym_id: 0 for gym_id in gym_ids}
+        counts.update(dict(rows))
+        return counts
+
+    @staticmethod
+    def _not_sent(gym_id, dedupe_key):
+        return ~exists().where(
+            NotificationModel.gym_id == gym_id,
+            NotificationModel.dedupe_key == dedupe_key
+        )
+
+    def generate_expiring_members(self, now: datetime, days: int = 7) -> List[dict]:
+        """One weekly warning per gym with active memberships ending in the next `days` days."""
+        year, week, _ = now.isocalendar()
+        dedupe_key = f"members_expiring:{year}-W{week:02d}"
+        expiring = func.count(MemberModel.id)
+        stmt = select(
+            MemberModel.gym_id,
+            literal("Membresías por vencer"),
+            cast(expiring, String).concat(f" membresías vencen en los próximos {days} días"),
+            literal("warning"),
+            literal(False, Boolean),
+            literal(datetime.utcnow(), DateTime),
+            literal(dedupe_key)
+        ).where(
+            MemberModel.membership_status == 'active',
+            MemberModel.end_date >= now,
+            MemberModel.end_date < now + timedelta(days=days),
+            self._not_sent(MemberModel.gym_id, dedupe_key)
+        ).group_by(MemberModel.gym_id)
+        return self._insert_from_select(stmt)
+
+    def generate_subscription_renewals(self, now: datetime, days: int = 3) -> List[dict]:
+        """One notice per active SaaS subscription ending in the next `days` days."""
+        dedupe_key = literal("subscription_renewal:").concat(cast(SubscriptionModel.id, String))
+        stmt = select(
+            SubscriptionModel.gym_id,
+            literal("Renovación de suscripción"),
+            literal("Tu suscripción ").concat(SubscriptionModel.plan_type).concat(f" se renueva en los próximos {days} días"),
+            literal("info"),
+            literal(False, Boolean),
+            literal(datetime.utcnow(), DateTime),
+            dedupe_key
+        ).where(
+            SubscriptionModel.status == 'active',
+            SubscriptionModel.end_date >= now,
+            SubscriptionModel.end_date < now + timedelta(days=days),
+            self._not_sent(SubscriptionModel.gym_id, dedupe_key)
+        )
+        return self._insert_from_select(stmt)
@@ -0,0 +1,64 @@
+import abc
+import threading
+import traceback
+from datetime import datetime
+
+class PeriodicJob(abc.ABC):
+    """Runs `run_once` on a daemon thread every `interval_seconds`.
+
+    The first run happens right after `start`. An interval of 0 or less
+    disables the job; `run_once` can still be called directly, e.g. from
+    manage.py. A failing run is counted and logged, and the loop carries on.
+    """
+
+    thread_name = "periodic-job"
+
+    def __init__(self, interval_seconds: int):
+        self.interval_seconds = interval_seconds
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self.runs = 0
+        self.failures = 0
+        self.last_run_at = None
+
+    @abc.abstractmethod
+    def run_once(self):
+        """One pass of the job; subclasses implement it."""
+
+    def start(self) -> None:
+        if self.interval_seconds <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopping:
+            try:
+                self.run_once()
+            except Exception:
+                self.failures += 1
+                traceback.print_exc()
+            self._wakeup.wait(self.interval_seconds)
+
+    def _record_run(self, moment: datetime) -> None:
+        self.runs += 1
+        self.last_run_at = moment
+
+    def stop(self) -> None:
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._stopping = False
+        self._wakeup.clear()
+
+    def stats(self) -> dict:
+        return {
+            "interval_seconds": self.interval_seconds,
+            "running": self._thread is not None,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_run_at": self.last_run_at
+        }
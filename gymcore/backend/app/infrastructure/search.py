@@ -0,0 +1,176 @@
+"""
+Full-text search over members and gyms.
+
+On SQLite the index is a pair of external-content FTS5 tables (members_fts,
+gyms_fts) kept in sync by triggers, so every write path — routes, bulk
+inserts, migrations, manual SQL — updates it without application hooks.
+Other databases, or a SQLite build without FTS5, fall back to ILIKE over the
+same columns.
+"""
+import re
+from typing import Optional
+from sqlalchemy import Float, Integer, inspect, or_, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from app.infrastructure.database import GymModel, MemberModel
+
+MEMBER_SEARCH_COLUMNS = ("full_name", "dni", "email", "phone")
+GYM_SEARCH_COLUMNS = ("name", "email")
+
+# Column weights for bm25(): a name hit ranks above a DNI/email/phone hit
+MEMBER_RANK_WEIGHTS = (10.0, 5.0, 2.0, 2.0)
+
+# Above this many matches results are not ranked (see search_members)
+RANKED_MATCH_LIMIT = 1000
+
+SEARCH_INDEX_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS members_fts USING fts5(
+        full_name, dni, email, phone, gym_id UNINDEXED,
+        content='members', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS members_fts_insert AFTER INSERT ON members BEGIN
+        INSERT INTO members_fts(rowid, full_name, dni, email, phone, gym_id)
+        VALUES (new.id, new.full_name, new.dni, new.email, new.phone, new.gym_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS members_fts_delete AFTER DELETE ON members BEGIN
+        INSERT INTO members_fts(members_fts, rowid, full_name, dni, email, phone, gym_id)
+        VALUES ('delete', old.id, old.full_name, old.dni, old.email, old.phone, old.gym_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS members_fts_update AFTER UPDATE OF full_name, dni, email, phone, gym_id ON members BEGIN
+        INSERT INTO members_fts(members_fts, rowid, full_name, dni, email, phone, gym_id)
+        VALUES ('delete', old.id, old.full_name, old.dni, old.email, old.phone, old.gym_id);
+        INSERT INTO members_fts(rowid, full_name, dni, email, phone, gym_id)
+        VALUES (new.id, new.full_name, new.dni, new.email, new.phone, new.gym_id);
+    END
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS gyms_fts USING fts5(
+        name, email,
+        content='gyms', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS gyms_fts_insert AFTER INSERT ON gyms BEGIN
+        INSERT INTO gyms_fts(rowid, name, email) VALUES (new.id, new.name, new.email);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS gyms_fts_delete AFTER DELETE ON gyms BEGIN
+        INSERT INTO gyms_fts(gyms_fts, rowid, name, email) VALUES ('delete', old.id, old.name, old.email);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS gyms_fts_update AFTER UPDATE OF name, email ON gyms BEGIN
+        INSERT INTO gyms_fts(gyms_fts, rowid, name, email) VALUES ('delete', old.id, old.name, old.email);
+        INSERT INTO gyms_fts(rowid, name, email) VALUES (new.id, new.name, new.email);
+    END
+    """,
+]
+
+_available = set()
+
+def fts5_supported(conn: Connection) -> bool:
+    if conn.dialect.name != "sqlite":
+        return False
+    options = conn.exec_driver_sql("PRAGMA compile_options").scalars().all()
+    return "ENABLE_FTS5" in options
+
+def create_search_index(conn: Connection) -> bool:
+    """Create the FTS tables and triggers and (re)build them from the base tables."""
+    if not fts5_supported(conn):
+        return False
+    for statement in SEARCH_INDEX_DDL:
+        conn.exec_driver_sql(statement)
+    conn.exec_driver_sql("INSERT INTO members_fts(members_fts) VALUES ('rebuild')")
+    conn.exec_driver_sql("INSERT INTO gyms_fts(gyms_fts) VALUES ('rebuild')")
+    return True
+
+def search_index_available(db: Session) -> bool:
+    bind = db.get_bind()
+    if str(bind.url) in _available:
+        return True
+    if bind.dialect.name != "sqlite" or not inspect(bind).has_table("members_fts"):
+        return False
+    _available.add(str(bind.url))
+    return True
+
+def match_expression(term: str) -> Optional[str]:
+    """Turn free text into an FTS5 query: every word must match, each as a prefix.
+
+    Single-character words are dropped when longer ones are present: a
+    one-letter prefix is not covered by the prefix index and would expand to
+    most of the vocabulary.
+    """
+    words = re.findall(r"\w+", term)
+    if not words:
+        return None
+    words = [word for word in words if len(word) > 1] or words
+    return " ".join(f'"{word}"*' for word in words)
+
+def _members_like(query, term: str):
+    pattern = f"%{term}%"
+    return query.filter(or_(*(getattr(MemberModel, column).ilike(pattern) for column in MEMBER_SEARCH_COLUMNS)))
+
+def search_members(db: Session, query, gym_id: int, term: str, ranked: bool = True):
+    """Restrict a MemberModel query of `gym_id` to `term`.
+
+    With `ranked` the best matches come first; otherwise only the filter is
+    applied and the caller keeps its own ordering. Digit-only terms (pieces
+    of a DNI or phone number) are matched as substrings with ILIKE, since
+    the index only matches tokens by prefix.
+    """
+    expression = match_expression(term) if search_index_available(db) else None
+    if expression is None:
+        return _members_like(query, term)
+    if term.strip().isdigit():
+        query = _members_like(query, term.strip())
+        return query.order_by(MemberModel.id) if ranked else query
+    # gym_id is UNINDEXED in members_fts, but filtering on it here keeps
+    # counts and scoring to this gym's matches instead of the whole platform
+    params = {"expression": expression, "gym_id": gym_id}
+    if not ranked:
+        matches = text(
+            "SELECT rowid FROM members_fts WHERE members_fts MATCH :expression AND gym_id = :gym_id"
+        ).bindparams(**params).columns(rowid=Integer)
+        return query.filter(MemberModel.id.in_(matches))
+    # bm25() has to score every match before LIMIT applies, so very broad
+    # terms ("a", a common surname) are returned in id order instead
+    candidates = db.execute(
+        text(
+            "SELECT count(*) FROM (SELECT 1 FROM members_fts "
+            "WHERE members_fts MATCH :expression AND gym_id = :gym_id LIMIT :cap)"
+        ),
+        {**params, "cap": RANKED_MATCH_LIMIT}
+    ).scalar()
+    if candidates >= RANKED_MATCH_LIMIT:
+        matches = text(
+            "SELECT rowid AS member_id FROM members_fts WHERE members_fts MATCH :expression AND gym_id = :gym_id"
+        ).bindparams(**params).columns(member_id=Integer).subquery("member_matches")
+        # Ordering by the FTS rowid lets SQLite stream matches and stop at LIMIT
+        return query.join(matches, matches.c.member_id == MemberModel.id).order_by(matches.c.member_id)
+    weights = ", ".join(str(weight) for weight in MEMBER_RANK_WEIGHTS)
+    matches = text(
+        f"SELECT rowid AS member_id, bm25(members_fts, {weights}) AS score "
+        "FROM members_fts WHERE members_fts MATCH :expression AND gym_id = :gym_id"
+    ).bindparams(**params).columns(member_id=Integer, score=Float).subquery("member_matches")
+    return query.join(matches, matches.c.member_id == MemberModel.id).order_by(matches.c.score, MemberModel.id)
+
+def search_gyms(db: Session, query, term: str):
+    """Restrict a GymModel query to `term`. The caller keeps its own ordering."""
+    expression = match_expression(term) if search_index_available(db) else None
+    if expression is None:
+        pattern = f"%{term}%"
+        return query.filter(or_(*(getattr(GymModel, column).ilike(pattern) for column in GYM_SEARCH_COLUMNS)))
+    matches = text(
+        "SELECT rowid FROM gyms_fts WHERE gyms_fts MATCH :expression"
+    ).bindparams(expression=expression).columns(rowid=Integer)
+    return query.filter(GymModel.id.in_(matches))
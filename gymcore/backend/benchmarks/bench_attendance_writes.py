@@ -0,0 +1,70 @@
+"""
+Benchmark de escritura de asistencias: commit por fila vs. buffer con
+group-commit, con varios kioscos registrando en paralelo.
+
+Uso: python -m benchmarks.bench_attendance_writes   (desde gymcore/backend)
+Usa una base SQLite temporal; no toca la base configurada en .env.
+"""
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.infrastructure.database import Base, AttendanceModel
+from app.infrastructure.repositories import AttendanceRepository
+from app.infrastructure.attendance_buffer import AttendanceWriteBuffer
+from app.infrastructure import attendance_buffer as buffer_module
+
+CHECK_INS = 2000
+KIOSKS = 16
+
+def direct_mode(session_factory):
+    def check_in(i):
+        db = session_factory()
+        try:
+            AttendanceRepository(db).check_in(member_id=i % 500 + 1, gym_id=1)
+        finally:
+            db.close()
+    with ThreadPoolExecutor(KIOSKS) as pool:
+        list(pool.map(check_in, range(CHECK_INS)))
+
+def buffered_mode(buffer):
+    def check_in(i):
+        buffer.submit(member_id=i % 500 + 1, gym_id=1, check_in_time=datetime.now())
+    with ThreadPoolExecutor(KIOSKS) as pool:
+        list(pool.map(check_in, range(CHECK_INS)))
+    buffer.stop()
+
+def run(label, fn, session_factory):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    db = session_factory()
+    rows = db.query(AttendanceModel).count()
+    db.query(AttendanceModel).delete()
+    db.commit()
+    db.close()
+    print(f"{label:<28} {rows:>6} filas en {elapsed:6.2f}s  ->  {rows / elapsed:8.0f} check-ins/s")
+
+def main():
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    buffer_module.SessionLocal = session_factory
+
+    print(f"{CHECK_INS} check-ins desde {KIOSKS} kioscos concurrentes (SQLite en {path})")
+    run("Commit por fila", lambda: direct_mode(session_factory), session_factory)
+    for interval_ms, max_rows in ((50, 50), (200, 100), (200, 500)):
+        buffer = AttendanceWriteBuffer(
+            flush_interval_ms=interval_ms,
+            max_rows=max_rows,
+            max_attempts=settings.ATTENDANCE_FLUSH_MAX_ATTEMPTS
+        )
+        run(f"Buffer {interval_ms}ms / {max_rows} filas", lambda: buffered_mode(buffer), session_factory)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark de memoria de las exportaciones: pico de memoria al generar el CSV
+de socios y de asistencias para gimnasios de distinto tamaño.
+
+Uso: python -m benchmarks.bench_exports   (desde gymcore/backend)
+Usa una base SQLite temporal; no toca la base configurada en .env.
+El cuerpo se consume sin guardarlo, como lo haría el socket de la respuesta.
+"""
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from app.infrastructure.database import Base, GymModel, MemberModel, AttendanceModel
+from app.infrastructure.repositories import MemberRepository, AttendanceRepository
+from app.api.routes.members import MEMBER_EXPORT_FIELDS
+from app.api.routes.attendance import ATTENDANCE_EXPORT_FIELDS
+from app.api.streaming import stream_rows
+
+SIZES = [1_000, 10_000, 100_000, 300_000]
+
+def seed(session_factory, gym_id, rows):
+    db = session_factory()
+    now = datetime.now()
+    db.execute(insert(GymModel), [{"id": gym_id, "name": f"Gym {gym_id}", "email": f"gym{gym_id}@bench.pe"}])
+    first_id = gym_id * 1_000_000
+    for start in range(0, rows, 50_000):
+        count = min(50_000, rows - start)
+        db.execute(insert(MemberModel), [
+            {
+                "id": first_id + start + i,
+                "gym_id": gym_id,
+                "full_name": f"Socio {start + i}",
+                "dni": f"{gym_id:02d}{start + i:08d}",
+                "email": f"socio{start + i}@gym{gym_id}.pe",
+                "phone": "999999999",
+                "membership_status": "active",
+                "start_date": now,
+                "end_date": now + timedelta(days=30)
+            }
+            for i in range(count)
+        ])
+        db.execute(insert(AttendanceModel), [
+            {"member_id": first_id + start + i, "gym_id": gym_id, "check_in_time": now - timedelta(minutes=start + i)}
+            for i in range(count)
+        ])
+    db.commit()
+    db.close()
+
+async def drain(response):
+    size = 0
+    async for chunk in response.body_iterator:
+        size += len(chunk)
+    return size
+
+def measure(rows, fields):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = asyncio.run(drain(stream_rows(rows, fields, "csv", filename="bench")))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, elapsed, peak
+
+def main():
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    for gym_id, rows in enumerate(SIZES, start=1):
+        seed(session_factory, gym_id, rows)
+
+    print(f"Exportación CSV (SQLite en {path})")
+    print(f"{'filas':>8} {'recurso':<12} {'tamaño':>10} {'tiempo':>8} {'pico memoria':>13}")
+    for gym_id, rows in enumerate(SIZES, start=1):
+        db = session_factory()
+        for label, source, fields in (
+            ("socios", MemberRepository(db).iter_export(gym_id), MEMBER_EXPORT_FIELDS),
+            ("asistencias", AttendanceRepository(db).iter_range(gym_id, None, None), ATTENDANCE_EXPORT_FIELDS),
+        ):
+            size, elapsed, peak = measure(source, fields)
+            print(f"{rows:>8} {label:<12} {size / 2**20:8.1f}MB {elapsed:7.2f}s {peak / 2**20:11.2f}MB")
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Micro-benchmark: CPU por request para decodificar el token en una ruta
+protegida, con verificación de firma completa vs. el cache de payloads.
+
+Uso: python -m benchmarks.bench_jwt_decode   (desde gymcore/backend)
+"""
+import time
+from app.core.security import create_access_token, decode_access_token, token_cache
+
+ITERATIONS = 20000
+
+def cpu_per_call(fn, iterations=ITERATIONS):
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - start) / iterations * 1_000_000
+
+def main():
+    token = create_access_token(data={"sub": "bench@gymcore.com", "gym_id": 1, "role": "admin", "is_active": True})
+
+    def uncached():
+        token_cache.clear()
+        decode_access_token(token)
+
+    def cached():
+        decode_access_token(token)
+
+    decode_access_token(token)
+    cold = cpu_per_call(uncached)
+    warm = cpu_per_call(cached)
+
+    print(f"Iteraciones:          {ITERATIONS}")
+    print(f"Verificación completa: {cold:8.2f} µs CPU / request")
+    print(f"Payload en cache:      {warm:8.2f} µs CPU / request")
+    print(f"Ahorro:                {cold - warm:8.2f} µs CPU / request ({(1 - warm / cold) * 100:.1f}%)")
+    print(f"Cache: {token_cache.stats()}")
+
+if __name__ == "__main__":
+    main()
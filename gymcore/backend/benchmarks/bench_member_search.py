@@ -0,0 +1,87 @@
+"""
+Benchmark de búsqueda de socios: ILIKE '%término%' vs. índice FTS5.
+
+Uso: python -m benchmarks.bench_member_search   (desde gymcore/backend)
+Usa una base SQLite temporal con 120k socios en un gimnasio y 30k en otro;
+no toca la base configurada en .env.
+"""
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from sqlalchemy import create_engine, insert, or_
+from sqlalchemy.orm import sessionmaker
+from app.infrastructure.database import Base, GymModel, MemberModel
+from app.infrastructure.search import create_search_index, search_members, MEMBER_SEARCH_COLUMNS
+
+MEMBERS_PER_GYM = {1: 120_000, 2: 30_000}
+RUNS = 20
+FIRST_NAMES = ["Ana", "Luis", "María", "José", "Carmen", "Jorge", "Lucía", "Pedro", "Rosa", "Diego", "Valeria", "Miguel"]
+LAST_NAMES = ["García", "Quispe", "Flores", "Rodríguez", "Huamán", "Mendoza", "Torres", "Rojas", "Vargas", "Castillo", "Chávez", "Ramos"]
+TERMS = ["quis", "maría torres", "7654", "ana@", "castillo r", "zzzz"]
+
+def seed(session_factory):
+    rng = random.Random(42)
+    db = session_factory()
+    db.execute(insert(GymModel), [{"id": gym_id, "name": f"Gym {gym_id}", "email": f"gym{gym_id}@bench.pe"} for gym_id in MEMBERS_PER_GYM])
+    next_id = 1
+    for gym_id, total in MEMBERS_PER_GYM.items():
+        rows = []
+        for _ in range(total):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            rows.append({
+                "id": next_id,
+                "gym_id": gym_id,
+                "full_name": f"{first} {last} {rng.choice(LAST_NAMES)}",
+                "dni": f"{next_id:08d}",
+                "email": f"{first.lower()}.{last.lower()}{next_id}@mail.pe",
+                "phone": f"9{rng.randrange(10**8):08d}",
+                "membership_status": "active",
+                "start_date": datetime.now()
+            })
+            next_id += 1
+        db.execute(insert(MemberModel), rows)
+    db.commit()
+    db.close()
+
+def ilike_search(db, query, term):
+    pattern = f"%{term}%"
+    return query.filter(or_(*(getattr(MemberModel, column).ilike(pattern) for column in MEMBER_SEARCH_COLUMNS)))
+
+def measure(session_factory, search, term):
+    db = session_factory()
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        query = db.query(MemberModel).filter(MemberModel.gym_id == 1)
+        rows = search(db, query, term).limit(10).all()
+        timings.append((time.perf_counter() - start) * 1000)
+    db.close()
+    return statistics.median(timings), len(rows)
+
+def main():
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    print(f"Insertando {sum(MEMBERS_PER_GYM.values())} socios (SQLite en {path})")
+    seed(session_factory)
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        create_search_index(conn)
+    print(f"Índice FTS5 construido en {time.perf_counter() - start:.2f}s\n")
+
+    print(f"Mediana de {RUNS} búsquedas en el gimnasio con {MEMBERS_PER_GYM[1]} socios (limit 10)")
+    print(f"{'término':<16} {'ILIKE':>10} {'FTS5':>10} {'mejora':>8}")
+    for term in TERMS:
+        ilike_ms, _ = measure(session_factory, ilike_search, term)
+        fts_ms, _ = measure(session_factory, search_members, term)
+        print(f"{term:<16} {ilike_ms:8.2f}ms {fts_ms:8.2f}ms {ilike_ms / fts_ms:7.1f}x")
+    print("\nILIKE sale antes con términos muy frecuentes (le bastan las 10 primeras filas);")
+    print("sin coincidencias o con pocas recorre la tabla entera del gimnasio.")
+
+if __name__ == "__main__":
+    main()
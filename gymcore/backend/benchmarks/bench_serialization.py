@@ -0,0 +1,111 @@
+"""
+Benchmark de serialización del listado de socios: modelos ORM validados con
+response_model y codificados con json (camino anterior) vs. filas por
+columnas codificadas con orjson sin revalidar (camino actual).
+
+Uso: python -m benchmarks.bench_serialization   (desde gymcore/backend)
+Usa una base SQLite temporal; no toca la base configurada en .env.
+Se mide por separado la lectura de la base y la serialización a bytes.
+"""
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker, joinedload
+from app.infrastructure.database import Base, GymModel, MemberModel, MembershipPlanModel
+from app.api.schemas.members import MemberResponse
+from app.api.routes.members import MEMBER_LIST_FIELDS, PLAN_INFO_FIELDS, _member_list_rows
+from app.api.responses import fast_json
+
+SIZES = [1_000, 10_000, 100_000]
+RUNS = 3
+RESPONSE_FIELD = create_response_field(name="Response_get_members", type_=List[MemberResponse])
+
+def seed(session_factory, rows):
+    db = session_factory()
+    now = datetime.now()
+    db.execute(insert(GymModel), [{"id": 1, "name": "Gym 1", "email": "gym1@bench.pe"}])
+    db.execute(insert(MembershipPlanModel), [
+        {"id": plan_id, "gym_id": 1, "name": f"Plan {plan_id}", "price": 50.0 * plan_id, "duration_days": 30 * plan_id}
+        for plan_id in (1, 2, 3)
+    ])
+    for start in range(0, rows, 50_000):
+        db.execute(insert(MemberModel), [
+            {
+                "gym_id": 1,
+                "plan_id": (i % 4) or None,
+                "full_name": f"Socio {i}",
+                "dni": f"{i:08d}",
+                "email": f"socio{i}@gym1.pe",
+                "phone": "999999999",
+                "membership_status": "active",
+                "start_date": now,
+                "end_date": now + timedelta(days=30),
+                "created_at": now - timedelta(seconds=i),
+                "updated_at": now
+            }
+            for i in range(start, min(start + 50_000, rows))
+        ])
+    db.commit()
+    db.close()
+
+def orm_path(db, limit):
+    start = time.perf_counter()
+    members = db.query(MemberModel).options(joinedload(MemberModel.membership_plan)).filter(
+        MemberModel.gym_id == 1
+    ).order_by(MemberModel.created_at.desc(), MemberModel.id.desc()).limit(limit).all()
+    fetched = time.perf_counter()
+    content = asyncio.run(serialize_response(field=RESPONSE_FIELD, response_content=members))
+    body = JSONResponse(content).body
+    return fetched - start, time.perf_counter() - fetched, len(body)
+
+def column_path(db, limit):
+    start = time.perf_counter()
+    rows = db.query(
+        *(getattr(MemberModel, field) for field in MEMBER_LIST_FIELDS),
+        *(getattr(MembershipPlanModel, field).label(f"membership_plan_{field}") for field in PLAN_INFO_FIELDS)
+    ).outerjoin(
+        MembershipPlanModel, MembershipPlanModel.id == MemberModel.plan_id
+    ).filter(MemberModel.gym_id == 1).order_by(MemberModel.created_at.desc(), MemberModel.id.desc()).limit(limit).all()
+    fetched = time.perf_counter()
+    body = fast_json(_member_list_rows(rows)).body
+    return fetched - start, time.perf_counter() - fetched, len(body)
+
+def measure(session_factory, path, limit):
+    fetch_times, serialize_times = [], []
+    for _ in range(RUNS):
+        db = session_factory()
+        fetch, serialize, size = path(db, limit)
+        db.close()
+        fetch_times.append(fetch)
+        serialize_times.append(serialize)
+    return statistics.median(fetch_times), statistics.median(serialize_times), size
+
+def main():
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    seed(session_factory, max(SIZES))
+
+    print(f"Listado de socios, mediana de {RUNS} corridas (SQLite en {path})")
+    print(f"{'filas':>8} {'camino':<18} {'lectura':>9} {'serializ.':>10} {'µs/fila':>8} {'tamaño':>9}")
+    for limit in SIZES:
+        results = {}
+        for label, fn in (("ORM + pydantic", orm_path), ("columnas + orjson", column_path)):
+            fetch, serialize, size = measure(session_factory, fn, limit)
+            results[label] = (fetch, serialize)
+            print(f"{limit:>8} {label:<18} {fetch * 1000:7.1f}ms {serialize * 1000:8.1f}ms {serialize / limit * 1e6:8.2f} {size / 2**20:7.2f}MB")
+        (old_fetch, old_serialize), (new_fetch, new_serialize) = results.values()
+        print(f"{'':>8} ahorro: {(old_serialize - new_serialize) / limit * 1e6:.2f} µs/fila en serialización, "
+              f"{(old_fetch + old_serialize - new_fetch - new_serialize) / limit * 1e6:.2f} µs/fila en total\n")
+
+if __name__ == "__main__":
+    main()
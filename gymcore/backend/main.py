@@ -1,13 +1,16 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.infrastructure.database import Base, engine
+from fastapi.responses import JSONResponse
+from app.infrastructure.database import engine
+from app.infrastructure.migrations import pending_migrations
+from app.infrastructure.attendance_buffer import attendance_buffer
+from app.infrastructure.expiry_sweeper import expiry_sweeper
+from app.infrastructure.notification_scheduler import notification_scheduler
 from app.api.routes import router as api_router
 from app.core.config import settings
+from app.core.security import PasswordHasherBusy
 import json
 
-# Create tables
-Base.metadata.create_all(bind=engine)
-
 app = FastAPI(title="GymCore API")
 
 # CORS
@@ -22,10 +25,42 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "X-Sync-Cursor"],
 )
 
 app.include_router(api_router, prefix="/api/v1")
 
+@app.exception_handler(PasswordHasherBusy)
+def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Demasiados inicios de sesión simultáneos. Intenta nuevamente."},
+        headers={"Retry-After": "1"}
+    )
+
+@app.on_event("startup")
+def check_schema_version():
+    pending = pending_migrations(engine)
+    if pending:
+        names = ", ".join(f"{version:04d}_{name}" for version, name, _ in pending)
+        print(f"⚠️  Hay migraciones pendientes ({names}). Ejecuta: python manage.py migrate")
+
+@app.on_event("startup")
+def start_background_jobs():
+    # They need the current schema; skip until migrated
+    if not pending_migrations(engine):
+        expiry_sweeper.start()
+        notification_scheduler.start()
+
+@app.on_event("shutdown")
+def flush_attendance_buffer():
+    attendance_buffer.stop()
+
+@app.on_event("shutdown")
+def stop_background_jobs():
+    expiry_sweeper.stop()
+    notification_scheduler.stop()
+
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
@@ -0,0 +1,108 @@
+"""
+Comandos de mantenimiento de GymCore.
+
+Uso (desde gymcore/backend):
+    python manage.py migrate
+    python manage.py rebuild-attendance-rollup [--gym-id ID]
+    python manage.py rebuild-gym-counters [--gym-id ID]
+    python manage.py reconcile-platform-metrics
+    python manage.py expire-memberships
+    python manage.py generate-notifications
+
+reconcile-platform-metrics está pensado para ejecutarse periódicamente
+(cron o tarea programada), por ejemplo cada hora.
+"""
+import argparse
+from app.infrastructure.database import engine, SessionLocal
+from app.infrastructure.migrations import run_migrations
+from app.infrastructure.repositories import AttendanceRepository, GymCounterRepository, PlatformMetricsRepository
+from app.infrastructure.expiry_sweeper import expiry_sweeper
+from app.infrastructure.notification_scheduler import notification_scheduler
+
+def migrate(args):
+    applied = run_migrations(engine)
+    if not applied:
+        print("✅ La base de datos ya está al día")
+        return
+    for name in applied:
+        print(f"✅ Migración aplicada: {name}")
+
+def rebuild_attendance_rollup(args):
+    db = SessionLocal()
+    try:
+        AttendanceRepository(db).rebuild_rollup(args.gym_id)
+        db.commit()
+        scope = f"del gimnasio {args.gym_id}" if args.gym_id else "de todos los gimnasios"
+        print(f"✅ Resumen horario de asistencias reconstruido {scope}")
+    except Exception as e:
+        print(f"❌ Error al reconstruir el resumen: {str(e)}")
+        db.rollback()
+    finally:
+        db.close()
+
+def rebuild_gym_counters(args):
+    db = SessionLocal()
+    try:
+        GymCounterRepository(db).rebuild(args.gym_id)
+        db.commit()
+        scope = f"del gimnasio {args.gym_id}" if args.gym_id else "de todos los gimnasios"
+        print(f"✅ Contadores reconstruidos {scope}")
+    except Exception as e:
+        print(f"❌ Error al reconstruir los contadores: {str(e)}")
+        db.rollback()
+    finally:
+        db.close()
+
+def reconcile_platform_metrics(args):
+    db = SessionLocal()
+    try:
+        metrics = PlatformMetricsRepository(db).recompute()
+        db.commit()
+        print(f"✅ Métricas globales reconciliadas: {metrics.total_gyms} gimnasios, {metrics.total_members} socios")
+    except Exception as e:
+        print(f"❌ Error al reconciliar las métricas: {str(e)}")
+        db.rollback()
+    finally:
+        db.close()
+
+def expire_memberships(args):
+    try:
+        expired = expiry_sweeper.sweep()
+        print(f"✅ Membresías vencidas: {sum(expired.values())} en {len(expired)} gimnasios")
+    except Exception as e:
+        print(f"❌ Error al vencer las membresías: {str(e)}")
+
+def generate_notifications(args):
+    try:
+        created = notification_scheduler.generate()
+        for condition, count in created.items():
+            print(f"✅ {condition}: {count} notificaciones nuevas")
+    except Exception as e:
+        print(f"❌ Error al generar las notificaciones: {str(e)}")
+
+COMMANDS = {
+    "migrate": (migrate, "Aplica las migraciones pendientes del esquema", []),
+    "rebuild-attendance-rollup": (rebuild_attendance_rollup, "Recalcula attendance_hourly desde las asistencias", [
+        ("--gym-id", {"type": int, "default": None, "help": "Solo este gimnasio"}),
+    ]),
+    "rebuild-gym-counters": (rebuild_gym_counters, "Recalcula gym_counters desde socios y asistencias", [
+        ("--gym-id", {"type": int, "default": None, "help": "Solo este gimnasio"}),
+    ]),
+    "reconcile-platform-metrics": (reconcile_platform_metrics, "Recalcula platform_metrics desde gimnasios, socios y suscripciones", []),
+    "expire-memberships": (expire_memberships, "Marca como 'expired' las membresías activas ya vencidas", []),
+    "generate-notifications": (generate_notifications, "Genera las notificaciones de vencimientos y renovaciones", []),
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Comandos de mantenimiento de GymCore")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, (handler, help_text, arguments) in COMMANDS.items():
+        subparser = subparsers.add_parser(name, help=help_text)
+        for flag, options in arguments:
+            subparser.add_argument(flag, **options)
+        subparser.set_defaults(handler=handler)
+    args = parser.parse_args()
+    args.handler(args)
+
+if __name__ == "__main__":
+    main()
@@ -338,6 +338,50 @@ def test_dashboard_endpoints():
     except Exception as e:
         print_test("GET /dashboard/stats", False, str(e))
 
+def test_attendance_batch():
+    """Prueba la sincronización en bloque de escaneos de un kiosco"""
+    print_section("SINCRONIZACIÓN DE ASISTENCIAS")
+    
+    headers = {"Authorization": f"Bearer {test_data['token']}"}
+    now = datetime.now()
+    dni = str(random.randint(10000000, 99999999))
+    
+    try:
+        resp = requests.post(f"{BASE_URL}/membership-plans/", json={
+            "name": f"Plan {get_random_string()}",
+            "price": 50,
+            "duration_days": 30
+        }, headers=headers)
+        resp = requests.post(f"{BASE_URL}/members/", json={
+            "full_name": "Batch Member",
+            "dni": dni,
+            "email": f"batch_{get_random_string()}@test.com",
+            "phone": "555-4321",
+            "plan_id": resp.json().get('id'),
+            "start_date": now.isoformat()
+        }, headers=headers)
+        print_test("POST /members/ (socio con DNI)", resp.status_code == 201,
+                   f"Status: {resp.status_code}")
+        if resp.status_code != 201:
+            return
+    except Exception as e:
+        print_test("POST /members/ (socio con DNI)", False, str(e))
+        return
+    
+    # Un escaneo válido, uno anterior al alta del socio y uno con fecha futura
+    try:
+        resp = requests.post(f"{BASE_URL}/attendance/check-in/batch", json={"records": [
+            {"dni": dni, "scanned_at": (now + timedelta(minutes=1)).isoformat()},
+            {"dni": dni, "scanned_at": datetime(2020, 1, 1, 8, 0).isoformat()},
+            {"dni": dni, "scanned_at": (now + timedelta(days=1)).isoformat()}
+        ]}, headers=headers)
+        statuses = [result['status'] for result in resp.json().get('results', [])] if resp.status_code == 200 else []
+        print_test("POST /attendance/check-in/batch",
+                   statuses == ["ok", "before_start", "future"] and resp.json().get('accepted') == 1,
+                   f"Status: {resp.status_code} - Resultados: {statuses}")
+    except Exception as e:
+        print_test("POST /attendance/check-in/batch", False, str(e))
+
 def test_notification_endpoints():
     """Prueba endpoints de notificaciones"""
     print_section("ENDPOINTS DE NOTIFICACIONES")
@@ -394,6 +438,7 @@ def main():
     test_member_endpoints()
     test_billing_endpoints()
     test_dashboard_endpoints()
+    test_attendance_batch()
     test_notification_endpoints()
     
     print("\n" + "="*60)
@@ -0,0 +1,102 @@
+"""
+Test de migraciones: base nueva y actualización desde el esquema original.
+
+No necesita el servidor. Cada caso usa una base SQLite temporal; no toca la
+base configurada en .env.
+
+Uso: python test_migrations.py   (desde gymcore/backend; también con pytest)
+"""
+import os
+import tempfile
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, inspect
+from app.infrastructure.migrations import MIGRATIONS, run_migrations
+
+# Esquema anterior a las migraciones versionadas (lo que creaba create_all
+# al importar main.py). Congelado: no debe seguir a los modelos actuales.
+BASELINE_SCHEMA = [
+    "CREATE TABLE gyms (id INTEGER NOT NULL PRIMARY KEY, name VARCHAR, email VARCHAR, phone VARCHAR, address VARCHAR, plan_type VARCHAR, is_active BOOLEAN, created_at DATETIME, updated_at DATETIME)",
+    "CREATE INDEX ix_gyms_id ON gyms (id)",
+    "CREATE INDEX ix_gyms_name ON gyms (name)",
+    "CREATE UNIQUE INDEX ix_gyms_email ON gyms (email)",
+    "CREATE TABLE users (id INTEGER NOT NULL PRIMARY KEY, gym_id INTEGER REFERENCES gyms (id), email VARCHAR, hashed_password VARCHAR, full_name VARCHAR, role VARCHAR, is_active BOOLEAN, created_at DATETIME)",
+    "CREATE UNIQUE INDEX ix_users_email ON users (email)",
+    "CREATE INDEX ix_users_id ON users (id)",
+    "CREATE TABLE membership_plans (id INTEGER NOT NULL PRIMARY KEY, gym_id INTEGER REFERENCES gyms (id), name VARCHAR, description TEXT, price FLOAT, duration_days INTEGER, benefits TEXT, is_active BOOLEAN, created_at DATETIME, updated_at DATETIME)",
+    "CREATE INDEX ix_membership_plans_id ON membership_plans (id)",
+    "CREATE INDEX ix_membership_plans_name ON membership_plans (name)",
+    "CREATE TABLE subscriptions (id INTEGER NOT NULL PRIMARY KEY, gym_id INTEGER REFERENCES gyms (id), plan_type VARCHAR, amount FLOAT, status VARCHAR, start_date DATETIME, end_date DATETIME, cancelled_at DATETIME, created_at DATETIME)",
+    "CREATE INDEX ix_subscriptions_id ON subscriptions (id)",
+    "CREATE TABLE payment_methods (id INTEGER NOT NULL PRIMARY KEY, gym_id INTEGER REFERENCES gyms (id), last_four VARCHAR(4), card_type VARCHAR(20), expiry_month INTEGER, expiry_year INTEGER, is_active BOOLEAN, created_at DATETIME)",
+    "CREATE INDEX ix_payment_methods_id ON payment_methods (id)",
+    "CREATE TABLE notifications (id INTEGER NOT NULL PRIMARY KEY, gym_id INTEGER REFERENCES gyms (id), title VARCHAR(255), message TEXT, type VARCHAR(50), is_read BOOLEAN, created_at DATETIME)",
+    "CREATE INDEX ix_notifications_id ON notifications (id)",
+    "CREATE TABLE members (id INTEGER NOT NULL PRIMARY KEY, gym_id INTEGER REFERENCES gyms (id), plan_id INTEGER REFERENCES membership_plans (id), full_name VARCHAR, dni VARCHAR, email VARCHAR, phone VARCHAR, membership_type VARCHAR, membership_status VARCHAR, start_date DATETIME, end_date DATETIME, created_at DATETIME, updated_at DATETIME)",
+    "CREATE UNIQUE INDEX ix_members_dni ON members (dni)",
+    "CREATE INDEX ix_members_id ON members (id)",
+    "CREATE INDEX ix_members_email ON members (email)",
+    "CREATE TABLE password_reset_tokens (id INTEGER NOT NULL PRIMARY KEY, user_id INTEGER REFERENCES users (id), token VARCHAR(255), expires_at DATETIME, used BOOLEAN, created_at DATETIME)",
+    "CREATE INDEX ix_password_reset_tokens_id ON password_reset_tokens (id)",
+    "CREATE UNIQUE INDEX ix_password_reset_tokens_token ON password_reset_tokens (token)",
+    "CREATE TABLE attendances (id INTEGER NOT NULL PRIMARY KEY, member_id INTEGER REFERENCES members (id), gym_id INTEGER REFERENCES gyms (id), check_in_time DATETIME, created_at DATETIME)",
+    "CREATE INDEX ix_attendances_id ON attendances (id)",
+]
+
+def temp_engine():
+    return create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'migraciones.db')}")
+
+def seed_baseline(engine):
+    now = datetime.now()
+    with engine.begin() as conn:
+        for statement in BASELINE_SCHEMA:
+            conn.exec_driver_sql(statement)
+        conn.exec_driver_sql(
+            "INSERT INTO gyms (id, name, email, plan_type, is_active, created_at) VALUES (1, 'Gym', 'gym@test.pe', 'basic', 1, ?)",
+            (now,)
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO membership_plans (id, gym_id, name, price, duration_days, is_active, created_at) VALUES (1, 1, 'Mensual', 50, 30, 1, ?)",
+            (now,)
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO members (id, gym_id, plan_id, full_name, dni, email, phone, membership_status, start_date, end_date, created_at) "
+            "VALUES (1, 1, 1, 'Socio', '12345678', 's@test.pe', '999', 'active', ?, ?, ?)",
+            (now, now + timedelta(days=30), now)
+        )
+        conn.exec_driver_sql("INSERT INTO attendances (member_id, gym_id, check_in_time, created_at) VALUES (1, 1, ?, ?)", (now, now))
+        conn.exec_driver_sql("INSERT INTO notifications (gym_id, title, message, type, is_read, created_at) VALUES (1, 'Hola', 'Aviso', 'info', 0, ?)", (now,))
+
+def check_schema(engine):
+    inspector = inspect(engine)
+    assert "dedupe_key" in {column["name"] for column in inspector.get_columns("notifications")}
+    notification_indexes = {index["name"] for index in inspector.get_indexes("notifications")}
+    assert {"ix_notifications_gym_is_read_created_at", "ux_notifications_gym_dedupe_key"} <= notification_indexes
+    member_indexes = {index["name"] for index in inspector.get_indexes("members")}
+    assert {"ix_members_gym_status", "ix_members_gym_full_name", "ix_members_status_end_date"} <= member_indexes
+    for table in ("attendance_hourly", "revenue_ledger", "gym_counters", "platform_metrics", "resource_versions"):
+        assert inspector.has_table(table), table
+
+def test_fresh_database():
+    """Base vacía: se aplican todas las migraciones y una segunda corrida no hace nada"""
+    engine = temp_engine()
+    assert len(run_migrations(engine)) == len(MIGRATIONS)
+    assert run_migrations(engine) == []
+    check_schema(engine)
+    print("✓ PASS - Migraciones sobre una base nueva")
+
+def test_upgrade_from_baseline():
+    """Base con el esquema original y datos: se actualiza sin errores y rellena las tablas derivadas"""
+    engine = temp_engine()
+    seed_baseline(engine)
+    assert len(run_migrations(engine)) == len(MIGRATIONS)
+    assert run_migrations(engine) == []
+    check_schema(engine)
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT sum(check_ins) FROM attendance_hourly").scalar() == 1
+        assert conn.exec_driver_sql("SELECT count(*) FROM revenue_ledger").scalar() == 1
+        assert conn.exec_driver_sql("SELECT members, active_members FROM gym_counters WHERE gym_id = 1").one() == (1, 1)
+    print("✓ PASS - Actualización desde el esquema original")
+
+if __name__ == "__main__":
+    test_fresh_database()
+    test_upgrade_from_baseline()
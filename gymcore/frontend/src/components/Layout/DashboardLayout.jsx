@@ -53,9 +53,46 @@ const DashboardLayout = ({ children }) => {
     }
   };
 
+  const openNotificationStream = (onClosed) => {
+    const token = localStorage.getItem('token');
+    const source = new EventSource(
+      `${api.defaults.baseURL}/notifications/stream?access_token=${encodeURIComponent(token)}`
+    );
+    source.addEventListener('snapshot', (event) => {
+      const data = JSON.parse(event.data);
+      setNotifications(data.notifications);
+      setUnreadCount(data.unread_count);
+    });
+    source.addEventListener('notification', (event) => {
+      const notification = JSON.parse(event.data);
+      setNotifications(prev => [notification, ...prev.filter(n => n.id !== notification.id)]);
+    });
+    source.addEventListener('unread_count', (event) => {
+      setUnreadCount(JSON.parse(event.data).unread_count);
+    });
+    // EventSource retries dropped connections by itself, but gives up for
+    // good on an error response (expired token, inactive gym)
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED) onClosed();
+    };
+    return source;
+  };
+
   useEffect(() => {
-    fetchNotifications();
-    const interval = setInterval(fetchNotifications, 30000); // Poll every 30s
+    // Server-sent events when available, polling every 30s otherwise or
+    // once the stream is closed for good
+    let source = null;
+    let interval = null;
+    const startPolling = () => {
+      if (interval) return;
+      fetchNotifications();
+      interval = setInterval(fetchNotifications, 30000);
+    };
+    if (typeof EventSource !== 'undefined') {
+      source = openNotificationStream(startPolling);
+    } else {
+      startPolling();
+    }
     
     // Close dropdown when clicking outside
     const handleClickOutside = (event) => {
@@ -67,7 +104,8 @@ const DashboardLayout = ({ children }) => {
     document.addEventListener('mousedown', handleClickOutside);
     
     return () => {
-      clearInterval(interval);
+      if (source) source.close();
+      if (interval) clearInterval(interval);
       document.removeEventListener('mousedown', handleClickOutside);
     };
   }, []);
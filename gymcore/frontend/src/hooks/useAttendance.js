@@ -1,20 +1,38 @@
-import { useState, useCallback } from 'react';
+import { useState, useCallback, useRef } from 'react';
 import attendanceService from '../services/attendance.service';
 
 const useAttendance = () => {
   const [todayAttendances, setTodayAttendances] = useState([]);
   const [stats, setStats] = useState(null);
+  const [occupancy, setOccupancy] = useState(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
+  // Last check-in synced, by insert order (offline scans synced late carry
+  // earlier times); refreshes only fetch what was inserted after it
+  const cursorRef = useRef(null);
+
+  const mergeAttendances = useCallback((incoming) => {
+    if (!incoming.length) return;
+    setTodayAttendances(prev => {
+      const ids = new Set(incoming.map(a => a.id));
+      return [...incoming, ...prev.filter(a => !ids.has(a.id))]
+        .sort((a, b) => new Date(b.check_in_time) - new Date(a.check_in_time));
+    });
+  }, []);
+
+  const refreshTodayAttendances = useCallback(async () => {
+    const { attendances, cursor } = await attendanceService.getTodayAttendancesSince(cursorRef.current);
+    cursorRef.current = cursor;
+    mergeAttendances(attendances);
+  }, [mergeAttendances]);
 
   const checkIn = useCallback(async (dni) => {
     setLoading(true);
     setError(null);
     try {
       const attendance = await attendanceService.checkIn(dni);
-      // Refresh list after check-in
-      const data = await attendanceService.getTodayAttendances();
-      setTodayAttendances(data);
+      // Fetch only the check-ins registered since the last refresh
+      await refreshTodayAttendances();
       return attendance;
     } catch (err) {
       const errorMsg = err.response?.data?.detail || 'Error al registrar asistencia';
@@ -23,22 +41,56 @@ const useAttendance = () => {
     } finally {
       setLoading(false);
     }
-  }, []);
+  }, [refreshTodayAttendances]);
 
   const fetchTodayAttendances = useCallback(async () => {
     setLoading(true);
     setError(null);
     try {
-      const data = await attendanceService.getTodayAttendances();
-      console.log('Attendances data received:', data);
-      setTodayAttendances(data);
+      await refreshTodayAttendances();
     } catch (err) {
       console.error('Error fetching attendances:', err);
       setError(err.response?.data?.detail || 'Error al cargar asistencias');
     } finally {
       setLoading(false);
     }
-  }, []);
+  }, [refreshTodayAttendances]);
+
+  // Live feed: pushes each check-in and the occupancy; reconnects from the
+  // last cursor so only missed check-ins are sent again. Returns a cleanup.
+  const connectLiveFeed = useCallback(() => {
+    let socket = null;
+    let retry = null;
+    let closed = false;
+
+    const connect = () => {
+      socket = attendanceService.openLiveFeed(cursorRef.current);
+      socket.onmessage = (event) => {
+        const message = JSON.parse(event.data);
+        if (message.type === 'snapshot') {
+          mergeAttendances(message.check_ins);
+        } else if (message.type === 'check_in') {
+          mergeAttendances([message.check_in]);
+        }
+        cursorRef.current = message.cursor || cursorRef.current;
+        setOccupancy(message.occupancy);
+      };
+      socket.onclose = () => {
+        if (!closed) retry = setTimeout(connect, 3000);
+      };
+    };
+
+    if (typeof WebSocket === 'undefined') {
+      attendanceService.getOccupancy().then(data => setOccupancy(data.occupancy)).catch(() => {});
+      return () => {};
+    }
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(retry);
+      if (socket) socket.close();
+    };
+  }, [mergeAttendances]);
 
   const fetchStats = useCallback(async () => {
     try {
@@ -66,10 +118,12 @@ const useAttendance = () => {
   return {
     todayAttendances,
     stats,
+    occupancy,
     loading,
     error,
     checkIn,
     fetchTodayAttendances,
+    connectLiveFeed,
     fetchStats,
     getMemberAttendances
   };
@@ -10,15 +10,11 @@ const useDashboardStats = () => {
 
   const fetchDashboardData = async () => {
     try {
-      const [statsData, activityData, revenueChartData] = await Promise.all([
-        dashboardService.getStats(),
-        dashboardService.getRecentActivity(),
-        dashboardService.getRevenueChart()
-      ]);
+      const data = await dashboardService.getBootstrap();
       
-      setStats(statsData);
-      setRecentActivity(activityData);
-      setRevenueData(revenueChartData);
+      setStats(data.stats);
+      setRecentActivity(data.recent_activity);
+      setRevenueData(data.revenue_chart);
       setError(null);
     } catch (err) {
       setError(err.response?.data?.detail || 'Error al cargar datos del dashboard');
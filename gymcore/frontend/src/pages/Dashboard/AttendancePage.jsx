@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react';
-import { UserCheck, Clock, Calendar, Users, CheckCircle } from 'lucide-react';
+import { UserCheck, Clock, Calendar, Users, CheckCircle, Activity } from 'lucide-react';
 import StatCard from '../../components/StatCard';
 import Button from '../../components/Button';
 import FormInput from '../../components/FormInput';
@@ -8,7 +8,7 @@ import useAttendance from '../../hooks/useAttendance';
 import SuccessModal from '../../components/SuccessModal';
 
 const AttendancePage = () => {
-  const { todayAttendances, stats, loading, error, checkIn, fetchTodayAttendances, fetchStats } = useAttendance();
+  const { todayAttendances, stats, occupancy, loading, error, checkIn, fetchTodayAttendances, connectLiveFeed, fetchStats } = useAttendance();
   const [dni, setDni] = useState('');
   const [checkInLoading, setCheckInLoading] = useState(false);
   const [errorMessage, setErrorMessage] = useState('');
@@ -20,6 +20,8 @@ const AttendancePage = () => {
     fetchStats();
   }, [fetchTodayAttendances, fetchStats]);
 
+  useEffect(() => connectLiveFeed(), [connectLiveFeed]);
+
   const handleCheckIn = async (e) => {
     e.preventDefault();
     if (!dni.trim()) {
@@ -42,7 +44,6 @@ const AttendancePage = () => {
       setShowSuccess(true);
       setDni('');
       await fetchStats(); // Refresh stats
-      await fetchTodayAttendances(); // Force refresh attendances
     } catch (err) {
       console.error('Check-in error:', err);
       setErrorMessage(err.message);
@@ -101,7 +102,7 @@ const AttendancePage = () => {
 
       {/* Stats */}
       {stats && (
-        <div className="grid gap-6 md:grid-cols-3">
+        <div className="grid gap-6 md:grid-cols-4">
           <StatCard 
             title="Asistencias Hoy" 
             value={stats.today_count} 
@@ -120,6 +121,12 @@ const AttendancePage = () => {
             icon={Calendar} 
             color="purple"
           />
+          <StatCard 
+            title="En el Gimnasio" 
+            value={occupancy ?? '-'} 
+            icon={Activity} 
+            color="green"
+          />
         </div>
       )}
 
@@ -191,7 +191,8 @@ const MembersPage = () => {
         const variants = {
           active: 'success',
           inactive: 'default',
-          suspended: 'warning'
+          suspended: 'warning',
+          expired: 'error'
         };
         return <Badge label={row.membership_status} variant={variants[row.membership_status]} />;
       }
@@ -259,6 +260,7 @@ const MembersPage = () => {
             <option value="active">Activos</option>
             <option value="inactive">Inactivos</option>
             <option value="suspended">Suspendidos</option>
+            <option value="expired">Vencidos</option>
           </select>
         </div>
       </div>
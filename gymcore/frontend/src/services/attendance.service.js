@@ -11,13 +11,42 @@ const attendanceService = {
     return response.data;
   },
 
-  getAttendancesByRange: async (days) => {
-    const response = await api.get('/attendance/range', {
-      params: { days }
+  // Only check-ins newer than `since`; the returned cursor goes in the next call
+  getTodayAttendancesSince: async (since) => {
+    const response = await api.get('/attendance/today', {
+      params: since ? { since } : {}
     });
+    return { attendances: response.data, cursor: response.headers['x-sync-cursor'] || since };
+  },
+
+  getOccupancy: async () => {
+    const response = await api.get('/attendance/occupancy');
     return response.data;
   },
 
+  // WebSocket with today's check-ins and occupancy; the token goes in the URL
+  openLiveFeed: (since) => {
+    const token = localStorage.getItem('token');
+    const params = new URLSearchParams({ access_token: token });
+    if (since) params.set('since', since);
+    const baseURL = api.defaults.baseURL.replace(/^http/, 'ws');
+    return new WebSocket(`${baseURL}/attendance/live?${params}`);
+  },
+
+  getAttendancesByRange: async (days) => {
+    // The endpoint is cursor-paginated: follow X-Next-Cursor until exhausted
+    const attendances = [];
+    let cursor = null;
+    do {
+      const response = await api.get('/attendance/range', {
+        params: cursor ? { days, limit: 1000, cursor } : { days, limit: 1000 }
+      });
+      attendances.push(...response.data);
+      cursor = response.headers['x-next-cursor'];
+    } while (cursor);
+    return attendances;
+  },
+
   getMemberAttendances: async (memberId, limit = 10) => {
     const response = await api.get(`/attendance/member/${memberId}`, {
       params: { limit }
@@ -15,6 +15,12 @@ const getRevenueChart = async () => {
   return response.data;
 };
 
+// Everything the dashboard shows, in one request
+const getBootstrap = async () => {
+  const response = await api.get('/dashboard/bootstrap');
+  return response.data;
+};
+
 // Alias for reports page compatibility
 const getRevenueData = async (gymId) => {
   return getRevenueChart();
@@ -24,5 +30,6 @@ export default {
   getStats,
   getRecentActivity,
   getRevenueChart,
-  getRevenueData
+  getRevenueData,
+  getBootstrap
 };
\ No newline at end of file
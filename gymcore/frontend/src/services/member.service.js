@@ -6,11 +6,31 @@ const getMembers = async (filters = {}) => {
   if (filters.limit) params.append('limit', filters.limit);
   if (filters.status) params.append('status', filters.status);
   if (filters.search) params.append('search', filters.search);
+  if (filters.sort) params.append('sort', filters.sort);
+  if (filters.cursor) params.append('cursor', filters.cursor);
   
   const response = await api.get(`/members/?${params.toString()}`);
   return response.data;
 };
 
+// One page plus the cursor for the next one and the cached total
+const getMembersPage = async (filters = {}) => {
+  const params = new URLSearchParams();
+  params.append('limit', filters.limit || 50);
+  if (filters.status) params.append('status', filters.status);
+  if (filters.search) params.append('search', filters.search);
+  params.append('sort', filters.sort || 'created_at');
+  if (filters.cursor) params.append('cursor', filters.cursor);
+
+  const response = await api.get(`/members/?${params.toString()}`);
+  const total = response.headers['x-total-count'];
+  return {
+    members: response.data,
+    nextCursor: response.headers['x-next-cursor'] || null,
+    total: total !== undefined ? Number(total) : null
+  };
+};
+
 const createMember = async (data) => {
   const response = await api.post('/members/', data);
   return response.data;
@@ -36,13 +56,21 @@ const activateMember = async (id) => {
   return response.data;
 };
 
-// Alias for getAll - used in reports
+// Alias for getAll - used in reports. Follows X-Next-Cursor until exhausted
 const getAll = async (gymId) => {
-  return getMembers({ limit: 1000 }); // Get all members (up to 1000)
+  const members = [];
+  let cursor = null;
+  do {
+    const page = await getMembersPage({ limit: 1000, cursor });
+    members.push(...page.members);
+    cursor = page.nextCursor;
+  } while (cursor);
+  return members;
 };
 
 export default {
   getMembers,
+  getMembersPage,
   getAll,
   createMember,
   updateMember,
@@ -5,7 +5,7 @@ echo ===================================================
 
 :: Iniciar Backend en una nueva ventana
 echo Iniciando Backend (FastAPI)...
-start "GymCore Backend" cmd /k "cd gymcore\backend && venv\Scripts\activate && uvicorn main:app --reload --port 8000"
+start "GymCore Backend" cmd /k "cd gymcore\backend && venv\Scripts\activate && python manage.py migrate && uvicorn main:app --reload --port 8000"
 
 :: Esperar unos segundos para que el backend arranque
 timeout /t 5 /nobreak >nul